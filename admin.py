@@ -38,7 +38,17 @@ class ItemAdmin(admin.ModelAdmin):
 
 admin.site.register(Item, ItemAdmin)
 
-admin.site.register(History)
+
+class HistoryAdmin(admin.ModelAdmin):
+    list_select_related = ["user"]
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        History.attach_objects(changelist.result_list)
+        return changelist
+
+
+admin.site.register(History, HistoryAdmin)
 
 
 class StatusAdmin(admin.ModelAdmin):
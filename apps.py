@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class LibtekinConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'libtekin'
+
+    def ready(self):
+        from . import signals
+        from .labels import build_labels
+        from .search import install_sqlite_search
+
+        build_labels(self.get_models())
+
+        post_migrate.connect(install_sqlite_search, sender=self)
@@ -0,0 +1,28 @@
+# Benchmark cases run by the libtekin_benchmark management command.  Each case is
+# called with the inventory returned by synthetic.build_inventory and is timed as
+# a whole, so any setup that should not be measured belongs in the inventory
+
+from django.contrib.auth import get_user_model
+
+CASES = {}
+
+
+def benchmark(name):
+    def register(function):
+        CASES[name] = function
+        return function
+
+    return register
+
+
+def get_user(inventory):
+    # The user that views and history are run as, created by the untimed run
+    if "user" not in inventory:
+        inventory["user"], created = get_user_model().objects.get_or_create(
+            username="libtekin_benchmark",
+            defaults={"is_superuser": True, "is_staff": True},
+        )
+    return inventory["user"]
+
+
+from . import filters, items, labels, lookups
@@ -0,0 +1,70 @@
+from django.http import QueryDict
+from django.test import RequestFactory
+
+from libtekin.filterset import ItemFilter
+from libtekin.models import Item
+from libtekin.pagination import KeysetPaginator
+
+from . import benchmark
+
+# Representative values for each ItemFilter filter, given the inventory
+FILTER_DATA = {
+    "combined_text_search": lambda inventory: {"combined_text_search": ["model 1"]},
+    "primary_id": lambda inventory: {"primary_id": ["0001"]},
+    "common_name": lambda inventory: {"common_name": ["item 1"]},
+    "role__in": lambda inventory: {"role__in": [inventory["roles"][0].pk]},
+    "assignee__in": lambda inventory: {
+        "assignee__in": [member.pk for member in inventory["members"][:5]]
+    },
+    "historical_assignements__assignee__in": lambda inventory: {
+        "historical_assignements__assignee__in": [
+            member.pk for member in inventory["members"][:5]
+        ]
+    },
+    "borrower__in": lambda inventory: {
+        "borrower__in": [member.pk for member in inventory["members"][:5]]
+    },
+    "historical_borrow__borrower__in": lambda inventory: {
+        "historical_borrow__borrower__in": [
+            member.pk for member in inventory["members"][:5]
+        ]
+    },
+    "mmodel__in": lambda inventory: {
+        "mmodel__in": [mmodel.pk for mmodel in inventory["mmodels"][:3]]
+    },
+    "mmodel__category__in": lambda inventory: {
+        "mmodel__category__in": [inventory["categories"][0].pk]
+    },
+    "serial_number": lambda inventory: {"serial_number": ["0001"]},
+    "bios_serial_number": lambda inventory: {"bios_serial_number": ["0001"]},
+    "asset_number": lambda inventory: {"asset_number": ["0001"]},
+    "barcode_icontains": lambda inventory: {"barcode_icontains": ["0001"]},
+    "network_name": lambda inventory: {
+        "network_name": ["lib-0001"],
+        "network_name_lookup": ["icontains"],
+    },
+    "status__in": lambda inventory: {"status__in": [inventory["statuses"][1].pk]},
+    "status__is_active": lambda inventory: {"status__is_active": ["True"]},
+}
+
+
+def run_filter(data):
+    # What ItemList does with a filter: the count and the first page
+    querydict = QueryDict(mutable=True)
+    for key, values in data.items():
+        querydict.setlist(key, [str(value) for value in values])
+    request = RequestFactory().get("/", querydict)
+    filterset = ItemFilter(querydict, queryset=Item.objects.all(), request=request)
+    queryset = filterset.qs
+    queryset.count()
+    KeysetPaginator(queryset.for_columns(), 100).get_page(None)
+
+
+def register(name, data):
+    @benchmark(f"filter_{name}")
+    def case(inventory):
+        run_filter(data(inventory))
+
+
+for name, data in FILTER_DATA.items():
+    register(name, data)
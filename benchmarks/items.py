@@ -0,0 +1,59 @@
+from django.forms.models import model_to_dict
+from django.test import RequestFactory
+
+from libtekin import views
+from libtekin.forms import ItemForm
+from libtekin.models import Item
+
+from . import benchmark, get_user
+
+
+def middle_item(inventory):
+    if "middle_item" not in inventory:
+        inventory["middle_item"] = Item.objects.order_by("pk")[
+            len(inventory["primary_ids"]) // 2
+        ].pk
+    return Item.objects.get(pk=inventory["middle_item"])
+
+
+def changed_form(item):
+    # A bound ItemForm that changes the common name and the location
+    data = {
+        key: "" if value is None else value
+        for key, value in model_to_dict(item, fields=ItemForm._meta.fields).items()
+    }
+    data["common_name"] = "Renamed" if item.common_name != "Renamed" else "Renamed again"
+    data["location"] = item.home_id if item.location_id != item.home_id else ""
+    form = ItemForm(data, instance=item)
+    if not form.is_valid():
+        raise ValueError(form.errors.as_text())
+    return form
+
+
+@benchmark("item_csv")
+def item_csv(inventory):
+    request = RequestFactory().get("/")
+    request.user = get_user(inventory)
+    response = views.ItemCSV.as_view()(request)
+    for row in response.streaming_content:
+        pass
+
+
+@benchmark("item_save_with_history")
+def item_save_with_history(inventory):
+    # What ItemUpdate does once the formsets are valid
+    item = middle_item(inventory)
+    form = changed_form(item)
+    form.save()
+    views.update_history(form, "Item", item, get_user(inventory))
+
+
+@benchmark("update_history")
+def update_history(inventory):
+    item = middle_item(inventory)
+    views.update_history(changed_form(item), "Item", item, get_user(inventory))
+
+
+@benchmark("item_form_render")
+def item_form_render(inventory):
+    str(ItemForm(instance=middle_item(inventory)))
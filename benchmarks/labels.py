@@ -0,0 +1,23 @@
+from touglates.views import make_labels
+
+from libtekin.labels import get_labels
+from libtekin.models import Item, ItemNote
+
+from . import benchmark
+
+# What ItemDetail spends on labels per request, before and after the registry
+REQUESTS = 1000
+
+
+@benchmark("labels_make_labels")
+def labels_make_labels(inventory):
+    for count in range(REQUESTS):
+        make_labels(Item)
+        make_labels(ItemNote)
+
+
+@benchmark("labels_registry")
+def labels_registry(inventory):
+    for count in range(REQUESTS):
+        get_labels(Item)
+        get_labels(ItemNote)
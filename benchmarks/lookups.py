@@ -0,0 +1,18 @@
+from django.test import RequestFactory
+
+from libtekin import views
+from libtekin.models import Item
+
+from . import benchmark
+
+
+@benchmark("count_primary_id")
+def count_primary_id(inventory):
+    primary_id = inventory["primary_ids"][len(inventory["primary_ids"]) // 2]
+    views.count_primary_id(RequestFactory().get("/"), 0, primary_id)
+
+
+@benchmark("serial_number_iexact")
+def serial_number_iexact(inventory):
+    serial_number = inventory["primary_ids"][len(inventory["primary_ids"]) // 3]
+    Item.objects.filter(serial_number__iexact=serial_number.lower()).count()
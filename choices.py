@@ -0,0 +1,73 @@
+import uuid
+
+from django.core.cache import cache
+
+from .models import Item, Mmodel
+
+# The choice tables built by this process, by name, as (version, rows)
+choice_tables = {}
+
+
+def build_item_choices():
+    return [
+        (
+            item.pk,
+            str(item),
+            {"data-textforfilter": "{} {}".format(item.mmodel, item.primary_id)},
+        )
+        for item in Item.objects.select_related("mmodel").only(
+            "pk", "common_name", "primary_id", "mmodel__brand", "mmodel__model_name"
+        )
+    ]
+
+
+def build_mmodel_choices():
+    return [
+        (
+            mmodel.pk,
+            str(mmodel),
+            {"data-primary_id_field": mmodel.primary_id_field},
+        )
+        for mmodel in Mmodel.objects.only(
+            "pk", "brand", "model_name", "primary_id_field"
+        )
+    ]
+
+
+CHOICE_TABLE_BUILDERS = {
+    "item": build_item_choices,
+    "mmodel": build_mmodel_choices,
+}
+
+
+def version_key(name):
+    return f"libtekin_choices_{name}"
+
+
+def get_choice_version(name):
+    """
+    Returns the token that changes whenever clear_choice_table() is called for
+    name, or None when the cache does not keep values
+    """
+
+    version = cache.get(version_key(name))
+    if version is None:
+        cache.add(version_key(name), uuid.uuid4().hex, None)
+        version = cache.get(version_key(name))
+    return version
+
+
+def get_choice_table(name):
+    # Returns the (pk, label, option attributes) rows for a select widget, rebuilt
+    # with one query whenever the version changes
+    version = get_choice_version(name)
+    if name not in choice_tables or version is None or choice_tables[name][0] != version:
+        choice_tables[name] = (version, CHOICE_TABLE_BUILDERS[name]())
+
+    return choice_tables[name][1]
+
+
+def clear_choice_table(*names):
+    for name in names:
+        cache.delete(version_key(name))
+        choice_tables.pop(name, None)
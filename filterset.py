@@ -3,19 +3,33 @@ import django_filters
 
 from django_filters_stoex.filterset import StoexFilterSet
 from spl_members.models import Member
-from .models import Item, Mmodel, MmodelCategory, Role, Status
+from .forms import AutocompleteSelect
+from .models import (
+    Item,
+    ItemAssignee,
+    ItemBorrower,
+    ItemNote,
+    ItemNoteCategory,
+    ItemNoteLevel,
+    Mmodel,
+    MmodelCategory,
+    Role,
+    Status,
+)
+from .search import get_search_backend
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django import forms
-from django_filters_stoex.filters import CrossFieldSearchFilter
+from django.urls import reverse_lazy
 from touglates.widgets import DropdownSelectMultiple
 
 
 class ItemFilter(StoexFilterSet):
 
-    combined_text_search = CrossFieldSearchFilter(
+    # Searches Item.search_document, which holds Item.SEARCH_FIELDS
+    combined_text_search = django_filters.CharFilter(
         label="Text Search",
-        field_name="common_name,mmodel__model_name,network_name,serial_number,bios_serial_number,asset_number,assignee__name_full,assignee__name_prefered,barcode",
-        lookup_expr="icontains",
+        method="filter_combined_text_search",
     )
     primary_id = django_filters.CharFilter(
         label="Primary ID",
@@ -42,6 +56,7 @@ class ItemFilter(StoexFilterSet):
     historical_assignements__assignee__in = django_filters.ModelMultipleChoiceFilter(
         widget=DropdownSelectMultiple,
         field_name="historical_assignements__assignee",
+        method="filter_historical_assignees",
         label="Historical Assignees",
         queryset=Member.objects.all(),
     )
@@ -54,6 +69,7 @@ class ItemFilter(StoexFilterSet):
     historical_borrow__borrower__in = django_filters.ModelMultipleChoiceFilter(
         widget=DropdownSelectMultiple,
         field_name="historical_borrow__borrower",
+        method="filter_historical_borrowers",
         label="Historical Borrowers",
         queryset=Member.objects.all(),
     )
@@ -81,10 +97,10 @@ class ItemFilter(StoexFilterSet):
     barcode_icontains = django_filters.CharFilter(
         label="Barcode", field_name="barcode", lookup_expr="icontains"
     )
-    network_name = django_filters.CharFilter(
+    network_name = django_filters.LookupChoiceFilter(
         label="Network Name",
         field_name="network_name",
-        lookup_expr=["icontains", "iexact"],
+        lookup_choices=[("icontains", "Contains"), ("iexact", "Equals")],
     )
     status__in = django_filters.ModelMultipleChoiceFilter(
         widget=DropdownSelectMultiple,
@@ -132,6 +148,34 @@ class ItemFilter(StoexFilterSet):
         ),
     )
 
+    def filter_combined_text_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return get_search_backend(queryset.db).filter(queryset, value)
+
+    # The history filters test for a matching row with EXISTS instead of joining
+    # every assignment or loan and removing the duplicate items
+    def filter_historical_assignees(self, queryset, name, value):
+        # an empty selection cleans to queryset.none(), which is not an empty value
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                ItemAssignee.objects.filter(item=OuterRef("pk"), assignee__in=value)
+            )
+        )
+
+    def filter_historical_borrowers(self, queryset, name, value):
+        # an empty selection cleans to queryset.none(), which is not an empty value
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                ItemBorrower.objects.filter(item=OuterRef("pk"), borrower__in=value)
+            )
+        )
+
     class Meta:
         model = Item
         fields = [
@@ -154,3 +198,39 @@ class ItemFilter(StoexFilterSet):
             # "location",
             # "role",
         ]
+
+
+class ItemNoteFilter(django_filters.FilterSet):
+
+    level__in = django_filters.ModelMultipleChoiceFilter(
+        widget=DropdownSelectMultiple,
+        field_name="level",
+        label="Level",
+        queryset=ItemNoteLevel.objects.all(),
+    )
+    itemnotecategory__in = django_filters.ModelMultipleChoiceFilter(
+        widget=DropdownSelectMultiple,
+        field_name="itemnotecategory",
+        label="Category",
+        queryset=ItemNoteCategory.objects.all(),
+    )
+    flagged = django_filters.ChoiceFilter(
+        field_name="flagged",
+        label="Flagged",
+        choices=ItemNote._meta.get_field("flagged").choices,
+    )
+    item = django_filters.ModelChoiceFilter(
+        widget=AutocompleteSelect(reverse_lazy("libtekin:autocomplete-item")),
+        field_name="item",
+        label="Item",
+        queryset=Item.objects.all(),
+    )
+    when = django_filters.DateFromToRangeFilter(
+        label="When",
+        field_name="when",
+        widget=django_filters.widgets.DateRangeWidget(attrs={"type": "date"}),
+    )
+
+    class Meta:
+        model = ItemNote
+        fields = []
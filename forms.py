@@ -1,7 +1,18 @@
 from django.db.models import Q, F
 from django.conf import settings
-from django.forms import ModelForm, SelectDateWidget, inlineformset_factory, Select
+from django.forms import (
+    BaseInlineFormSet,
+    ModelChoiceField,
+    ModelForm,
+    Select,
+    SelectDateWidget,
+    inlineformset_factory,
+)
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+from django.utils.functional import cached_property
 from django.urls import reverse_lazy
+from .choices import get_choice_table
 from .models import (
     Entity,
     Item,
@@ -12,13 +23,38 @@ from .models import (
     Location,
     Mmodel,
     MmodelCategory,
+    Status,
 )
 from spl_members.models import Member
 from django import forms
 from touglates.widgets import TouglateDateInput, TouglatesRelatedSelect
 
 
-class MmodelSelect(Select):
+class ChoiceTableSelect(Select):
+    """
+    A select for a model choice field that renders its options from a cached
+    choice table instead of evaluating the field's queryset, so rendering
+    thousands of options costs at most one query.  The field's queryset still
+    validates the submitted value
+    """
+
+    choice_table = None
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        if not isinstance(choices, ModelChoiceIterator):
+            return super().optgroups(name, value, attrs)
+
+        rows = get_choice_table(self.choice_table)
+        self.option_attrs = {pk: option_attrs for pk, label, option_attrs in rows}
+        self.choices = [(pk, label) for pk, label, option_attrs in rows]
+        if choices.field.empty_label is not None:
+            self.choices.insert(0, ("", choices.field.empty_label))
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
     def create_option(
         self, name, value, label, selected, index, subindex=None, attrs=None
     ):
@@ -26,23 +62,76 @@ class MmodelSelect(Select):
             name, value, label, selected, index, subindex, attrs
         )
         if value:
-            option["attrs"]["data-primary_id_field"] = value.instance.primary_id_field
+            option["attrs"].update(getattr(self, "option_attrs", {}).get(value, {}))
         return option
 
 
-class ItemSelect(Select):
-    def create_option(
-        self, name, value, label, selected, index, subindex=None, attrs=None
-    ):
-        option = super().create_option(
-            name, value, label, selected, index, subindex, attrs
+class MmodelSelect(ChoiceTableSelect):
+    # options carry data-primary_id_field
+    choice_table = "mmodel"
+
+
+class ItemSelect(ChoiceTableSelect):
+    # data-textforfilter provides additional fields that can be used for filtering
+    choice_table = "item"
+
+
+class AutocompleteMixin:
+    """
+    Renders only the selected option of a model choice field, and points
+    autocomplete.js at a JSON endpoint for the rest, so the page does not grow
+    with the table
+    """
+
+    def __init__(self, autocomplete_url, *args, **kwargs):
+        self.autocomplete_url = autocomplete_url
+        super().__init__(*args, **kwargs)
+
+    class Media:
+        js = ["libtekin/autocomplete.js"]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = str(
+            self.autocomplete_url
         )
-        if value:
-            # data-textforfilter provides additional fields that can be used for filtering
-            option["attrs"]["data-textforfilter"] = "{} {}".format(
-                value.instance.mmodel, value.instance.primary_id
-            )
-        return option
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        if not isinstance(choices, ModelChoiceIterator):
+            return super().optgroups(name, value, attrs)
+
+        self.choices = []
+        if choices.field.empty_label is not None:
+            self.choices.append(("", choices.field.empty_label))
+        selected = [str(pk) for pk in value if pk]
+        # LazyInlineFormSet looks up the labels for all of its forms at once
+        labels = getattr(self, "selected_labels", None)
+        if labels is None or any(pk not in labels for pk in selected):
+            labels = {}
+            if selected:
+                try:
+                    labels = {
+                        str(object.pk): choices.field.label_from_instance(object)
+                        for object in choices.queryset.filter(pk__in=selected)
+                    }
+                except (ValueError, ValidationError):
+                    # submitted values that aren't pks, which the form reports
+                    pass
+        self.choices.extend((pk, labels[pk]) for pk in selected if pk in labels)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class AutocompleteSelect(AutocompleteMixin, Select):
+    pass
+
+
+class AutocompleteRelatedSelect(AutocompleteMixin, TouglatesRelatedSelect):
+    pass
 
 
 class EntityForm(ModelForm):
@@ -96,31 +185,38 @@ class ItemForm(ModelForm):
         ]
         widgets = {
             # "mmodel": MmodelSelect,
-            "mmodel": TouglatesRelatedSelect(
+            "mmodel": AutocompleteRelatedSelect(
+                reverse_lazy("libtekin:autocomplete-mmodel"),
                 related_data={
                     "model_name": "Mmodel",
                     "app_name": "libtekin",
                     "add_url": reverse_lazy("libtekin:mmodel-popup"),
                 },
-                add_filter_input=True,
             ),
             "latest_inventory": SelectDateWidget(),
             "installation_date": SelectDateWidget(),
-            "assignee": TouglatesRelatedSelect(
+            "connected_to": AutocompleteSelect(
+                reverse_lazy("libtekin:autocomplete-item")
+            ),
+            "assignee": AutocompleteRelatedSelect(
+                reverse_lazy("libtekin:autocomplete-member"),
                 related_data={
                     "model_name": "Member",
                     "app_name": "libtekin",
                     "add_url": reverse_lazy("libtekin:member-popup"),
                 },
-                add_filter_input=True,
             ),
-            "borrower": TouglatesRelatedSelect(
+            "borrower": AutocompleteRelatedSelect(
+                reverse_lazy("libtekin:autocomplete-member"),
                 related_data={
                     "model_name": "Member",
                     "app_name": "libtekin",
                     "add_url": reverse_lazy("libtekin:member-popup"),
                 },
-                add_filter_input=True,
+            ),
+            "home": AutocompleteSelect(reverse_lazy("libtekin:autocomplete-location")),
+            "location": AutocompleteSelect(
+                reverse_lazy("libtekin:autocomplete-location")
             ),
         }
 
@@ -134,12 +230,13 @@ class ItemBorrowerForm(ModelForm):
             "when",
         ]
         widgets = {
-            "borrower": TouglatesRelatedSelect(
+            "borrower": AutocompleteRelatedSelect(
+                reverse_lazy("libtekin:autocomplete-member"),
                 related_data={
                     "model_name": "Member",
                     "app_name": "libtekin",
                     "add_url": reverse_lazy("libtekin:member-popup"),
-                }
+                },
             ),
         }
 
@@ -153,12 +250,13 @@ class ItemAssigneeForm(ModelForm):
             "when",
         ]
         widgets = {
-            "assignee": TouglatesRelatedSelect(
+            "assignee": AutocompleteRelatedSelect(
+                reverse_lazy("libtekin:autocomplete-member"),
                 related_data={
                     "model_name": "Member",
                     "app_name": "libtekin",
                     "add_url": reverse_lazy("libtekin:member-popup"),
-                }
+                },
             ),
         }
 
@@ -245,10 +343,104 @@ class CSVOptionForm(forms.Form):
     )
 
 
-ItemItemNoteFormset = inlineformset_factory(Item, ItemNote, form=ItemNoteForm, extra=10)
+class ItemImportForm(forms.Form):
+
+    file = forms.FileField(
+        label="File",
+        help_text="A CSV file with the same columns as the CSV download, or a JSON lines file with the same keys",
+    )
+
+
+class ItemCascadeForm(forms.Form):
+
+    status = ModelChoiceField(
+        queryset=Status.objects.all(),
+        required=False,
+        help_text="The new status for this item and everything attached to it",
+    )
+    location = ModelChoiceField(
+        queryset=Location.objects.all(),
+        required=False,
+        widget=AutocompleteSelect(reverse_lazy("libtekin:autocomplete-location")),
+        help_text="The new location for this item and everything attached to it",
+    )
+
+
+class LazyInlineFormSet(BaseInlineFormSet):
+    """
+    An inline formset that renders no extra forms.  Blank forms are requested one
+    at a time with extra_form() when the user adds a row, and every form shares
+    one evaluated list of choices for each related field
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.shared_choices = {}
+        super().__init__(*args, **kwargs)
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        for name, field in form.fields.items():
+            if (
+                isinstance(field, ModelChoiceField)
+                and not field.widget.is_hidden
+                and not isinstance(field.widget, (ChoiceTableSelect, AutocompleteMixin))
+            ):
+                if name not in self.shared_choices:
+                    # iter() skips the COUNT query that list() makes for its length
+                    self.shared_choices[name] = list(iter(field.choices))
+                field.choices = self.shared_choices[name]
+
+    @cached_property
+    def forms(self):
+        forms = super().forms
+        if forms:
+            self.share_selected_labels(forms)
+        return forms
+
+    def share_selected_labels(self, forms):
+        # One query per autocomplete field for the selected options of every form,
+        # instead of one per form
+        for name, field in forms[0].fields.items():
+            if not (
+                isinstance(field, ModelChoiceField)
+                and isinstance(field.widget, AutocompleteMixin)
+            ):
+                continue
+            selected = set()
+            for form in forms:
+                value = form[name].value()
+                values = value if isinstance(value, (list, tuple)) else [value]
+                selected.update(str(pk) for pk in values if pk not in (None, ""))
+            try:
+                objects = field.queryset.in_bulk(list(selected))
+            except (ValueError, ValidationError):
+                continue
+            labels = {
+                str(pk): field.label_from_instance(object)
+                for pk, object in objects.items()
+            }
+            for form in forms:
+                form.fields[name].widget.selected_labels = labels
+
+    def extra_form(self, index):
+        form = self.form(
+            auto_id=self.auto_id,
+            prefix=self.add_prefix(index),
+            empty_permitted=True,
+            use_required_attribute=False,
+            **self.get_form_kwargs(None),
+            renderer=self.renderer,
+        )
+        self.add_fields(form, None)
+        return form
+
+
+ItemItemNoteFormset = inlineformset_factory(
+    Item, ItemNote, form=ItemNoteForm, formset=LazyInlineFormSet, extra=0
+)
 ItemBorrowerFormset = inlineformset_factory(
-    Item, ItemBorrower, form=ItemBorrowerForm, extra=10
+    Item, ItemBorrower, form=ItemBorrowerForm, formset=LazyInlineFormSet, extra=0
 )
 ItemAssigneeFormset = inlineformset_factory(
-    Item, ItemAssignee, form=ItemAssigneeForm, extra=10
+    Item, ItemAssignee, form=ItemAssigneeForm, formset=LazyInlineFormSet, extra=0
 )
@@ -0,0 +1,196 @@
+import csv
+import json
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from spl_members.models import Member
+
+from .choices import clear_choice_table
+from .models import (
+    Entity,
+    History,
+    Item,
+    ItemAssignee,
+    ItemBorrower,
+    ItemSummary,
+    Location,
+    Mmodel,
+    Role,
+    Status,
+)
+
+
+def lookup_key(value):
+    return str(value).strip().casefold()
+
+
+def build_lookup(objects, attributes, use_str=True):
+    lookup = {}
+    for object in objects:
+        names = [getattr(object, attribute) for attribute in attributes]
+        if use_str:
+            names.append(str(object))
+        for name in names:
+            if name:
+                lookup.setdefault(lookup_key(name), object.pk)
+    return lookup
+
+
+class ImportRowError(Exception):
+    pass
+
+
+class ItemImporter:
+    """
+    Imports items from rows laid out like the ItemCSV export.  Related objects are
+    resolved by name from lookups built once, and items are written with their
+    ItemAssignee, ItemBorrower and History rows using bulk_create, one transaction
+    per batch
+    """
+
+    date_columns = ["latest_inventory", "installation_date"]
+
+    def __init__(self, user=None, batch_size=1000, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.imported = 0
+        self.errors = []
+
+        locations = build_lookup(Location.objects.all(), ["full_name", "short_name"])
+        members = build_lookup(Member.objects.all(), ["name_full"])
+        self.lookups = {
+            "mmodel": build_lookup(Mmodel.objects.all(), ["model_name"]),
+            "connected_to": build_lookup(
+                Item.objects.only("pk", "common_name", "primary_id"),
+                ["primary_id", "common_name"],
+                use_str=False,
+            ),
+            "status": build_lookup(Status.objects.all(), ["name"]),
+            "owner": build_lookup(Entity.objects.all(), ["full_name", "friendly_name"]),
+            "assignee": members,
+            "borrower": members,
+            "home": locations,
+            "location": locations,
+            "role": build_lookup(Role.objects.all(), ["name"]),
+        }
+
+    def read_rows(self, file, format="csv"):
+        if format == "json":
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    self.errors.append((line_number, {}, str(e)))
+                    continue
+                if isinstance(row, dict):
+                    yield line_number, row
+                else:
+                    self.errors.append((line_number, {}, "not a JSON object"))
+        else:
+            for line_number, row in enumerate(csv.DictReader(file), start=2):
+                yield line_number, row
+
+    def build_item(self, row):
+        item = Item()
+        values = {}
+        for column in Item.CSV_COLUMNS:
+            value = row.get(column)
+            value = "" if value is None else str(value).strip()
+            if value:
+                values[column] = value
+
+            if column in self.lookups:
+                if value:
+                    try:
+                        setattr(
+                            item,
+                            column + "_id",
+                            self.lookups[column][lookup_key(value)],
+                        )
+                    except KeyError:
+                        raise ImportRowError(f'{column}: "{value}" was not found')
+            elif column in self.date_columns:
+                try:
+                    setattr(item, column, date.fromisoformat(value) if value else None)
+                except ValueError:
+                    raise ImportRowError(f'{column}: "{value}" is not a YYYY-MM-DD date')
+            else:
+                setattr(item, column, value)
+
+        item.clean_fields(exclude=list(self.lookups))
+        item.set_primary_id()
+        return item, values
+
+    def write_batch(self, batch):
+        items = [item for item, values in batch]
+        with transaction.atomic():
+            Item.objects.bulk_create(items)
+            Item.all_objects.filter(
+                pk__in=[item.pk for item in items]
+            ).update_search_documents()
+            ItemSummary.objects.add_items(items)
+            ItemAssignee.objects.bulk_create(
+                [
+                    ItemAssignee(item=item, assignee_id=item.assignee_id)
+                    for item in items
+                    if item.assignee_id
+                ]
+            )
+            ItemBorrower.objects.bulk_create(
+                [
+                    ItemBorrower(item=item, borrower_id=item.borrower_id)
+                    for item in items
+                    if item.borrower_id
+                ]
+            )
+            History.objects.bulk_create(
+                [
+                    History(
+                        user=self.user,
+                        modelname="Item",
+                        objectid=item.pk,
+                        fieldname=column,
+                        new_value=value,
+                    )
+                    for item, values in batch
+                    for column, value in values.items()
+                ],
+                batch_size=self.batch_size,
+            )
+        clear_choice_table("item")
+        self.imported = self.imported + len(items)
+        if self.progress is not None:
+            self.progress(self.imported, len(self.errors))
+
+    def run(self, file, format="csv"):
+        batch = []
+        for line_number, row in self.read_rows(file, format):
+            try:
+                batch.append(self.build_item(row))
+            except ImportRowError as e:
+                self.errors.append((line_number, row, str(e)))
+            except ValidationError as e:
+                self.errors.append((line_number, row, "; ".join(e.messages)))
+
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+
+        if batch:
+            self.write_batch(batch)
+
+        return self.imported
+
+    def write_errors(self, file):
+        writer = csv.writer(file)
+        writer.writerow(["line"] + Item.CSV_COLUMNS + ["error"])
+        for line_number, row, message in self.errors:
+            writer.writerow(
+                [line_number]
+                + [row.get(column, "") for column in Item.CSV_COLUMNS]
+                + [message]
+            )
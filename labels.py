@@ -0,0 +1,16 @@
+from touglates.views import make_labels
+
+# Field labels by model, built once by LibtekinConfig.ready() since they only
+# change with the code
+model_labels = {}
+
+
+def build_labels(models):
+    for model in models:
+        model_labels[model] = make_labels(model)
+
+
+def get_labels(model):
+    if model not in model_labels:
+        model_labels[model] = make_labels(model)
+    return model_labels[model]
@@ -0,0 +1,114 @@
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from libtekin.benchmarks import CASES
+from libtekin.synthetic import build_inventory
+
+
+class Command(BaseCommand):
+    help = "Times libtekin hot paths against synthetic inventories in a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="The numbers of items to benchmark against",
+        )
+        parser.add_argument(
+            "--case",
+            action="append",
+            choices=sorted(CASES),
+            help="A case to run.  May be repeated.  By default all cases are run",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="The number of timed runs of each case",
+        )
+        parser.add_argument(
+            "--output", help="A file to which the results are written as JSON"
+        )
+        parser.add_argument(
+            "--label",
+            default="",
+            help="A name for this run, such as a commit hash, stored in the JSON output",
+        )
+        parser.add_argument(
+            "--compare",
+            help="The JSON output of an earlier run, to report each median against",
+        )
+
+    def handle(self, *args, **options):
+        cases = options["case"] or sorted(CASES)
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        baseline = {}
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                for result in json.load(file)["results"]:
+                    baseline[(result["case"], result["size"])] = result["median_ms"]
+
+        results = []
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for size in options["sizes"]:
+                call_command("flush", interactive=False, verbosity=0)
+                started = time.perf_counter()
+                inventory = build_inventory(size)
+                self.stdout.write(
+                    f"Built {size} items in {time.perf_counter() - started:.1f}s"
+                )
+
+                for case in cases:
+                    # One untimed run to warm caches
+                    CASES[case](inventory)
+
+                    timings = []
+                    for count in range(options["repeat"]):
+                        with CaptureQueriesContext(connection) as queries:
+                            started = time.perf_counter()
+                            CASES[case](inventory)
+                            timings.append((time.perf_counter() - started) * 1000)
+
+                    result = {
+                        "case": case,
+                        "size": size,
+                        "repeat": options["repeat"],
+                        "queries": len(queries),
+                        "min_ms": round(min(timings), 3),
+                        "median_ms": round(statistics.median(timings), 3),
+                        "mean_ms": round(statistics.mean(timings), 3),
+                    }
+                    results.append(result)
+                    line = f"{case:<40} {size:>8} items  {result['median_ms']:>10.3f} ms median  {result['queries']:>4} queries"
+                    if baseline.get((case, size)):
+                        line = line + f"  {result['median_ms'] / baseline[(case, size)]:>6.2f}x"
+                    self.stdout.write(line)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(
+                    {
+                        "label": options["label"],
+                        "django": django.get_version(),
+                        "python": platform.python_version(),
+                        "database": connection.vendor,
+                        "results": results,
+                    },
+                    file,
+                    indent=2,
+                )
@@ -0,0 +1,76 @@
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from libtekin.imports import ItemImporter
+
+
+class Command(BaseCommand):
+    help = "Imports items from a CSV file laid out like the item CSV export, or from JSON lines with the same keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="The CSV or JSON lines file to import")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            help="The file format.  By default it is taken from the file extension",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of items written per transaction",
+        )
+        parser.add_argument(
+            "--errors",
+            help="A CSV file to which rows that could not be imported are written, with the reason",
+        )
+        parser.add_argument(
+            "--user", help="The username recorded as having made the changes"
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+
+        format = options["format"]
+        if format is None:
+            if os.path.splitext(options["file"])[1] in [".json", ".jsonl"]:
+                format = "json"
+            else:
+                format = "csv"
+
+        started = time.monotonic()
+
+        def progress(imported, errors):
+            self.stdout.write(
+                f"{imported} imported, {errors} errors, {time.monotonic() - started:.1f}s"
+            )
+
+        importer = ItemImporter(
+            user=user, batch_size=options["batch_size"], progress=progress
+        )
+        try:
+            with open(options["file"], encoding="utf-8-sig", newline="") as file:
+                importer.run(file, format)
+        except OSError as e:
+            raise CommandError(e)
+
+        if importer.errors and options["errors"]:
+            with open(options["errors"], "w", encoding="utf-8", newline="") as file:
+                importer.write_errors(file)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.imported} items with {len(importer.errors)} errors in {time.monotonic() - started:.1f}s"
+            )
+        )
+        if importer.errors and not options["errors"]:
+            for line_number, row, message in importer.errors:
+                self.stderr.write(f"line {line_number}: {message}")
@@ -0,0 +1,110 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    # Used as a database execute wrapper, so it sees every query whether or not
+    # DEBUG is on
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration = self.duration + time.perf_counter() - started
+            self.count = self.count + 1
+            self.statements[sql] = self.statements[sql] + 1
+
+
+class ProfileMiddleware:
+    """
+    Times libtekin views when LIBTEKIN_PROFILE is set, and reports the query
+    count, SQL time, template render time and the remaining Python time in a
+    Server-Timing header.  The three don't overlap: queries run while rendering
+    count as SQL, not as template time.  Requests slower than
+    LIBTEKIN_PROFILE_SLOW_MS are logged with their most repeated queries.  The
+    rows of a streamed response, such as the CSV export, are produced after the
+    header is sent and are not counted
+    """
+
+    def __init__(self, get_response):
+        if not (hasattr(settings, "LIBTEKIN_PROFILE") and settings.LIBTEKIN_PROFILE):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if hasattr(settings, "LIBTEKIN_PROFILE_SLOW_MS"):
+            self.slow_ms = settings.LIBTEKIN_PROFILE_SLOW_MS
+        else:
+            self.slow_ms = 500
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.libtekin_recorder = recorder
+        request.libtekin_render_ms = 0.0
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        if match is None or "libtekin" not in match.app_names:
+            return response
+
+        sql_ms = recorder.duration * 1000
+        render_ms = request.libtekin_render_ms
+        python_ms = max(total_ms - sql_ms - render_ms, 0)
+        response["Server-Timing"] = ", ".join(
+            [
+                f'sql;dur={sql_ms:.1f};desc="{recorder.count} queries"',
+                f"tpl;dur={render_ms:.1f}",
+                f"py;dur={python_ms:.1f}",
+                f'total;dur={total_ms:.1f};desc="{match.url_name}"',
+            ]
+        )
+
+        if total_ms >= self.slow_ms:
+            repeated = "\n".join(
+                f"  {count} x {sql}"
+                for sql, count in recorder.statements.most_common(5)
+                if count > 1
+            )
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries in %.0f ms, templates %.0f ms%s",
+                match.url_name,
+                request.get_full_path(),
+                total_ms,
+                recorder.count,
+                sql_ms,
+                render_ms,
+                "\nRepeated queries:\n" + repeated if repeated else "",
+            )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before the response is rendered, so the time to the post
+        # render callback, less the queries run meanwhile, is the render time
+        recorder = request.libtekin_recorder
+        started = time.perf_counter()
+        sql_started = recorder.duration
+
+        def rendered(response):
+            elapsed = time.perf_counter() - started - (recorder.duration - sql_started)
+            request.libtekin_render_ms = max(elapsed, 0) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+# The identifier filters of ItemFilter search with icontains, which PostgreSQL
+# compiles to UPPER(column::text) LIKE UPPER('%word%').  Only a trigram index can
+# serve that, so these are created when the pg_trgm extension is installed.
+# Exact and iexact lookups use the UPPER() prefix indexes of 0067
+TRIGRAM_INDEXES = [
+    ("libtekin_item_pid_trgm_idx", "primary_id"),
+    ("libtekin_item_serial_trgm_idx", "serial_number"),
+    ("libtekin_item_asset_trgm_idx", "asset_number"),
+    ("libtekin_item_barcode_trgm_idx", "barcode"),
+    ("libtekin_item_netname_trgm_idx", "network_name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON libtekin_item USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0064_remove_item_service_number_item_bios_serial_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['primary_id'], name='libtekin_item_pid_active_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,81 @@
+from django.db import DatabaseError, migrations, models, transaction
+
+
+def populate_search_documents(apps, schema_editor):
+    # Built in Python, as Item.build_search_document() does, since one SQL
+    # expression concatenating every field nests too deeply for SQLite
+    Item = apps.get_model("libtekin", "Item")
+    db_alias = schema_editor.connection.alias
+
+    fields = [
+        "common_name",
+        "mmodel__model_name",
+        "network_name",
+        "serial_number",
+        "bios_serial_number",
+        "asset_number",
+        "assignee__name_full",
+        "assignee__name_prefered",
+        "barcode",
+    ]
+    batch = []
+    for item in (
+        Item.objects.using(db_alias)
+        .select_related("mmodel", "assignee")
+        .order_by("pk")
+        .iterator(chunk_size=500)
+    ):
+        parts = []
+        for path in fields:
+            value = item
+            for attribute in path.split("__"):
+                value = getattr(value, attribute) if value is not None else None
+            parts.append(value or "")
+        item.search_document = "\n".join(parts).lower()
+        batch.append(item)
+        if len(batch) >= 500:
+            Item.objects.using(db_alias).bulk_update(batch, ["search_document"])
+            batch = []
+    if batch:
+        Item.objects.using(db_alias).bulk_update(batch, ["search_document"])
+
+
+def create_search_index(apps, schema_editor):
+    # SQLite gets an FTS5 table from libtekin.search after migrate instead
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS libtekin_item_search_trgm_idx "
+        "ON libtekin_item USING gin (search_document gin_trgm_ops)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS libtekin_item_search_trgm_idx")
+    elif schema_editor.connection.vendor == "sqlite":
+        for name in ["insert", "delete", "update"]:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS libtekin_item_search_{name}")
+        schema_editor.execute("DROP TABLE IF EXISTS libtekin_item_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0065_item_identifier_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='The text searched by the combined text search, kept up to date when the item is saved', verbose_name='search document'),
+        ),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
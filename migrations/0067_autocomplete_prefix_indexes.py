@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# The columns searched by the autocomplete views with istartswith, which
+# PostgreSQL compiles to UPPER(column::text) LIKE UPPER('word%')
+PREFIX_INDEXES = [
+    ("libtekin_item_name_prefix_idx", "libtekin.Item", "common_name"),
+    ("libtekin_item_pid_prefix_idx", "libtekin.Item", "primary_id"),
+    ("libtekin_item_serial_prefix_idx", "libtekin.Item", "serial_number"),
+    ("libtekin_item_asset_prefix_idx", "libtekin.Item", "asset_number"),
+    ("libtekin_item_barcode_prefix_idx", "libtekin.Item", "barcode"),
+    ("libtekin_item_netname_prefix_idx", "libtekin.Item", "network_name"),
+    ("libtekin_mmodel_brand_prefix_idx", "libtekin.Mmodel", "brand"),
+    ("libtekin_mmodel_name_prefix_idx", "libtekin.Mmodel", "model_name"),
+    ("libtekin_mmodel_number_prefix_idx", "libtekin.Mmodel", "model_number"),
+    ("libtekin_location_full_prefix_idx", "libtekin.Location", "full_name"),
+    ("libtekin_location_short_prefix_idx", "libtekin.Location", "short_name"),
+    ("libtekin_member_full_prefix_idx", "spl_members.Member", "name_full"),
+    ("libtekin_member_prefered_prefix_idx", "spl_members.Member", "name_prefered"),
+    ("libtekin_member_surname_prefix_idx", "spl_members.Member", "surname"),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # text_pattern_ops lets a LIKE prefix use the index under any collation.  The
+    # other databases have no equivalent that Django's lookups can use
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, model, column in PREFIX_INDEXES:
+        table = apps.get_model(model)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON {table} (UPPER({column}::text) text_pattern_ops)"
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, model, column in PREFIX_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0066_item_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_summary(apps, schema_editor):
+    Item = apps.get_model("libtekin", "Item")
+    ItemSummary = apps.get_model("libtekin", "ItemSummary")
+    db_alias = schema_editor.connection.alias
+
+    ItemSummary.objects.using(db_alias).bulk_create(
+        [
+            ItemSummary(
+                status_id=row["status_id"],
+                category_id=row["mmodel__category_id"],
+                location_id=row["location_id"],
+                role_id=row["role_id"],
+                is_deleted=row["is_deleted"],
+                count=row["count"],
+            )
+            for row in Item.objects.using(db_alias)
+            .order_by()
+            .values(
+                "status_id",
+                "mmodel__category_id",
+                "location_id",
+                "role_id",
+                "is_deleted",
+            )
+            .annotate(count=Count("pk"))
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0067_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False, help_text='If these items are deleted', verbose_name='is deleted')),
+                ('count', models.IntegerField(default=0, help_text='The number of items with these values', verbose_name='count')),
+                ('category', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='libtekin.mmodelcategory')),
+                ('location', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='libtekin.location')),
+                ('role', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='libtekin.role')),
+                ('status', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='libtekin.status')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_deleted', 'status', 'category', 'location', 'role'], name='libtekin_itemsummary_key_idx')],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0068_itemsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemassignee',
+            index=models.Index(fields=['assignee', 'item'], name='libtekin_itemassignee_who_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemborrower',
+            index=models.Index(fields=['borrower', 'item'], name='libtekin_itemborrower_who_idx'),
+        ),
+    ]
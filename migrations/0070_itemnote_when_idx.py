@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0069_itemassignee_who_idx_itemborrower_who_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemnote',
+            index=models.Index(models.OrderBy(models.F('when'), descending=True), models.OrderBy(models.F('id'), descending=True), name='libtekin_itemnote_when_idx'),
+        ),
+    ]
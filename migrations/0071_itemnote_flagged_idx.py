@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('libtekin', '0070_itemnote_when_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemnote',
+            index=models.Index(fields=['item', 'flagged', '-when'], name='libtekin_itemnote_flagged_idx'),
+        ),
+    ]
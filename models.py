@@ -1,3 +1,4 @@
+import uuid
 from datetime import date, datetime, timedelta
 from django.utils import timezone
 
@@ -5,25 +6,58 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core import exceptions
-from django.db import models
-from django.db.models import Count, OuterRef, Q, Subquery
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.expressions import RawSQL
 from django.db.models.functions import Concat
 from django.urls import reverse
 from spl_members.models import Member
 
 
+# The default status and note level are looked up for every new Item and ItemNote,
+# including unsaved form instances, so each process keeps them as (version, pk).
+# signals.py clears them whenever a Status or ItemNoteLevel is saved or deleted,
+# by changing the version in the shared cache, which other processes check
+default_pks = {}
+
+DEFAULT_PKS_VERSION_KEY = "libtekin_default_pks"
+
+
+def get_default_pks_version():
+    version = cache.get(DEFAULT_PKS_VERSION_KEY)
+    if version is None:
+        cache.add(DEFAULT_PKS_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(DEFAULT_PKS_VERSION_KEY)
+    return version
+
+
+def forget_default_pks():
+    cache.delete(DEFAULT_PKS_VERSION_KEY)
+    default_pks.clear()
+
+
+def clear_default_pks():
+    forget_default_pks()
+    # Again once the change commits, in case a lookup in the meantime read the
+    # old default
+    transaction.on_commit(forget_default_pks)
+
+
+def get_default_pk(name, queryset):
+    version = get_default_pks_version()
+    if name not in default_pks or version is None or default_pks[name][0] != version:
+        object = queryset.first()
+        default_pks[name] = (version, object.pk if object is not None else None)
+    return default_pks[name][1]
+
+
 def get_default_status():
-    try:
-        return Status.objects.filter(is_default=True).first().pk
-    except AttributeError:
-        return None
+    return get_default_pk("status", Status.objects.filter(is_default=True))
 
 
 def get_default_level():
-    try:
-        return ItemNoteLevel.objects.filter(number=0).first().pk
-    except AttributeError:
-        return None
+    return get_default_pk("level", ItemNoteLevel.objects.filter(number=0))
 
 
 class EntityCategory(models.Model):
@@ -229,12 +263,157 @@ class Status(models.Model):
         return self.name
 
 
-class ItemNotDeletedManager(models.Manager):
+class ItemQuerySet(models.QuerySet):
+    # The relation that has to be joined to display each list column
+    COLUMN_RELATIONS = {
+        "mmodel": "mmodel",
+        "role": "role",
+        "connected_to": "connected_to",
+        "status": "status",
+        "home": "home",
+        "location": "location",
+        "assignee": "assignee",
+        "borrower": "borrower",
+        "owner": "owner",
+    }
+
+    def for_columns(self, columns=None):
+        if not columns:
+            columns = self.COLUMN_RELATIONS.keys()
+        relations = [
+            relation
+            for column, relation in self.COLUMN_RELATIONS.items()
+            if column in columns
+        ]
+        if not relations:
+            return self
+        return self.select_related(*relations)
+
+    def for_detail(self):
+        # Everything item_display_fields.html shows, in a fixed number of queries
+        # however many notes and assignments the item has
+        return self.for_columns().prefetch_related(
+            Prefetch(
+                "itemnote_set",
+                queryset=ItemNote.objects.select_related("level", "itemnotecategory"),
+            ),
+            Prefetch(
+                "historical_assignements",
+                queryset=ItemAssignee.objects.select_related("assignee"),
+            ),
+            Prefetch(
+                "historical_borrow",
+                queryset=ItemBorrower.objects.select_related("borrower"),
+            ),
+        )
+
+    def with_status_notes(self):
+        # Each item's flagged notes, newest first, as status_notes, in one query
+        # for the whole page
+        return self.prefetch_related(
+            Prefetch(
+                "itemnote_set",
+                queryset=ItemNote.objects.filter(flagged__gt=0)
+                .order_by(F("when").desc(nulls_last=True), "-pk")
+                .only("item", "when", "maintext"),
+                to_attr="status_notes",
+            )
+        )
+
+    def connected_tree(self, item, ancestors=False, include_self=True):
+        """
+        Everything connected to item, transitively, through connected_to in one
+        query: the items attached to it, or with ancestors=True the items it is
+        attached to.  UNION drops rows already found, so a loop ends
+        """
+
+        quote_name = connections[self.db].ops.quote_name
+        table = quote_name(self.model._meta.db_table)
+        id = quote_name(self.model._meta.pk.column)
+        parent = quote_name(self.model._meta.get_field("connected_to").column)
+        if ancestors:
+            step = f"{table}.{id} = tree.parent"
+        else:
+            step = f"{table}.{parent} = tree.id"
+        sql = (
+            f"WITH RECURSIVE tree(id, parent) AS ("
+            f"SELECT {id}, {parent} FROM {table} WHERE {id} = %s "
+            f"UNION "
+            f"SELECT {table}.{id}, {table}.{parent} FROM {table} "
+            f"INNER JOIN tree ON {step}"
+            f") SELECT id FROM tree"
+        )
+        queryset = self.filter(pk__in=RawSQL(sql, [item.pk]))
+        if not include_self:
+            queryset = queryset.exclude(pk=item.pk)
+        return queryset
+
+    def update_connected(self, **values):
+        """
+        Updates these items with one UPDATE and keeps ItemSummary and the search
+        documents in step, for changes such as retiring a workstation with
+        everything attached to it.  Like update(), it sends no signals.  The
+        assignee and borrower can't be changed here, since their ItemAssignee
+        and ItemBorrower history is written by Item.save()
+        """
+
+        holders = {attname[:-3] for attname in self.model.HOLDER_FIELDS}
+        holders.update(self.model.HOLDER_FIELDS)
+        if holders.intersection(values):
+            raise ValueError("Change the assignee and borrower with Item.save()")
+
+        with transaction.atomic():
+            items = list(self.select_for_update().only(*self.model.SUMMARY_FIELDS))
+            ItemSummary.objects.add_items(items, -1)
+            pks = [item.pk for item in items]
+            updated = self.model.all_objects.filter(pk__in=pks).update(**values)
+            self.model.all_objects.filter(pk__in=pks).update_search_documents()
+            for item in items:
+                for name, value in values.items():
+                    setattr(item, name, value)
+            ItemSummary.objects.add_items(items)
+        return updated
+
+    def update_search_documents(self, batch_size=500):
+        """
+        Rebuilds search_document for writes that bypass save(), with
+        build_search_document() so the text is exactly what save() writes.  A
+        single SQL concatenation of every field nests too deeply for SQLite's
+        parser, so the documents are built here and written with bulk_update
+        """
+
+        relations = {
+            path.split("__")[0] for path in self.model.SEARCH_FIELDS if "__" in path
+        }
+        items = self.select_related(*relations).only(
+            "search_document", *self.model.SEARCH_FIELDS
+        )
+
+        updated = 0
+        batch = []
+        for item in items.order_by("pk").iterator(chunk_size=batch_size):
+            document = item.build_search_document()
+            if document != item.search_document:
+                item.search_document = document
+                batch.append(item)
+            if len(batch) >= batch_size:
+                updated = updated + self.model._base_manager.bulk_update(
+                    batch, ["search_document"]
+                )
+                batch = []
+        if batch:
+            updated = updated + self.model._base_manager.bulk_update(
+                batch, ["search_document"]
+            )
+        return updated
+
+
+class ItemNotDeletedManager(models.Manager.from_queryset(ItemQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
 
 
-class ItemAllManager(models.Manager):
+class ItemAllManager(models.Manager.from_queryset(ItemQuerySet)):
     def get_queryset(self):
         return super().get_queryset()
 
@@ -394,45 +573,199 @@ class Item(models.Model):
     is_deleted = models.BooleanField(
         "is deleted", default=False, help_text="If this item is deleted"
     )
+    search_document = models.TextField(
+        "search document",
+        blank=True,
+        default="",
+        editable=False,
+        help_text="The text searched by the combined text search, kept up to date when the item is saved",
+    )
+
+    # The fields copied into search_document
+    SEARCH_FIELDS = [
+        "common_name",
+        "mmodel__model_name",
+        "network_name",
+        "serial_number",
+        "bios_serial_number",
+        "asset_number",
+        "assignee__name_full",
+        "assignee__name_prefered",
+        "barcode",
+    ]
+    SEARCH_SEPARATOR = "\n"
+
+    CSV_COLUMNS = [
+        "common_name",
+        "mmodel",
+        "primary_id_field",
+        "serial_number",
+        "bios_serial_number",
+        "asset_number",
+        "barcode",
+        "phone_number",
+        "mobile_id",
+        "sim_iccid",
+        "connected_to",
+        "status",
+        "network_name",
+        "owner",
+        "assignee",
+        "borrower",
+        "home",
+        "latest_inventory",
+        "installation_date",
+        "location",
+        "role",
+    ]
 
     def get_absolute_url(self):
         return reverse("libtekin:item-detail", kwargs={"pk": self.pk})
 
     def get_current__status_notes(self):
-        current_notes = []
-        for note in self.itemnote_set.filter(flagged_gt=0):
-            current_notes.append(
-                "{}: {}".format(note.when.strftime("%Y-%m-%d"), note.text)
+        # Uses the notes fetched by ItemQuerySet.with_status_notes() when present
+        if hasattr(self, "status_notes"):
+            notes = self.status_notes
+        else:
+            notes = self.itemnote_set.filter(flagged__gt=0).order_by(
+                F("when").desc(nulls_last=True), "-pk"
             )
 
+        current_notes = []
+        for note in notes:
+            if note.when:
+                current_notes.append(
+                    "{}: {}".format(note.when.strftime("%Y-%m-%d"), note.maintext)
+                )
+            else:
+                current_notes.append(note.maintext)
+
         return current_notes
         # return separator.join(current_notes)
 
-    def save(self, *args, **kwargs):
+    def get_attached_tree(self):
+        # (item, depth) for everything attached to this item, transitively, in
+        # display order, from one query
+        children = {}
+        for item in (
+            Item.all_objects.connected_tree(self, include_self=False)
+            .select_related("mmodel", "status")
+            .order_by("primary_id", "pk")
+        ):
+            children.setdefault(item.connected_to_id, []).append(item)
+
+        tree = []
+        seen = {self.pk}
+        stack = [(item, 1) for item in reversed(children.get(self.pk, []))]
+        while stack:
+            item, depth = stack.pop()
+            if item.pk in seen:
+                continue
+            seen.add(item.pk)
+            tree.append((item, depth))
+            stack.extend(
+                (child, depth + 1) for child in reversed(children.get(item.pk, []))
+            )
+        return tree
+
+    def get_connection_chain(self):
+        # The items this one is attached to, nearest first, from one query
+        parents = {
+            item.pk: item
+            for item in Item.all_objects.connected_tree(
+                self, ancestors=True, include_self=False
+            )
+        }
+        chain = []
+        parent_id = self.connected_to_id
+        while parent_id in parents:
+            chain.append(parents.pop(parent_id))
+            parent_id = chain[-1].connected_to_id
+        return chain
+
+    # The holders whose changes are recorded in ItemAssignee and ItemBorrower
+    HOLDER_FIELDS = ["assignee_id", "borrower_id"]
+
+    # The fields that decide which ItemSummary row counts an item
+    SUMMARY_FIELDS = ["status_id", "mmodel_id", "location_id", "role_id", "is_deleted"]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_holders = {
+            attname: instance.__dict__[attname]
+            for attname in cls.HOLDER_FIELDS
+            if attname in instance.__dict__
+        }
+        instance.loaded_summary = {
+            attname: instance.__dict__[attname]
+            for attname in cls.SUMMARY_FIELDS
+            if attname in instance.__dict__
+        }
+        return instance
+
+    def changed_holders(self, update_fields=None):
+        if self.pk is None or self._state.adding:
+            loaded = {attname: None for attname in self.HOLDER_FIELDS}
+        else:
+            loaded = getattr(self, "loaded_holders", {})
+
+        # A holder left deferred by only() or defer() can't have been changed
+        deferred = self.get_deferred_fields()
+
+        changed = []
+        for attname in self.HOLDER_FIELDS:
+            if attname in deferred:
+                continue
+            if (
+                update_fields is not None
+                and attname not in update_fields
+                and attname[:-3] not in update_fields
+            ):
+                continue
+            if attname not in loaded or loaded[attname] != getattr(self, attname):
+                changed.append(attname)
+        return changed
+
+    def set_primary_id(self):
         if self.primary_id_field:
             setattr(self, "primary_id", getattr(self, self.primary_id_field))
 
-        saved = super().save(*args, **kwargs)
+    def build_search_document(self):
+        parts = []
+        for path in self.SEARCH_FIELDS:
+            value = self
+            for attribute in path.split("__"):
+                value = getattr(value, attribute) if value is not None else None
+            parts.append(value or "")
+        return self.SEARCH_SEPARATOR.join(parts).lower()
 
-        item_assignee_recents = ItemAssignee.objects.filter(
-            item=self,
-            assignee=self.assignee,
-            when__gte=datetime.now() + timedelta(hours=-1),
-        )
-        if item_assignee_recents.exists():
-            if item_assignee_recents.last() != self.assignee:
-                ItemAssignee.objects.create(item=self, assignee=self.assignee)
-        else:
-            ItemAssignee.objects.create(item=self, assignee=self.assignee)
+    def save(self, *args, **kwargs):
+        self.set_primary_id()
 
+        # Before build_search_document(), which loads any deferred holders
+        changed_holders = self.changed_holders(kwargs.get("update_fields"))
 
-        item_borrower_recents = ItemBorrower.objects.filter(
-            item=self,
-            borrower=self.borrower,
-            when__gte=datetime.now() + timedelta(hours=-1),
-        )
-        if not item_borrower_recents.exists():
-            ItemBorrower.objects.create(item=self, borrower=self.borrower)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.search_document = self.build_search_document()
+        elif {path.split("__")[0] for path in self.SEARCH_FIELDS} & set(update_fields):
+            self.search_document = self.build_search_document()
+            kwargs["update_fields"] = list(update_fields) + ["search_document"]
+
+        saved = super().save(*args, **kwargs)
+
+        if "assignee_id" in changed_holders:
+            ItemAssignee.objects.create(item=self, assignee_id=self.assignee_id)
+        if "borrower_id" in changed_holders:
+            ItemBorrower.objects.create(item=self, borrower_id=self.borrower_id)
+
+        self.loaded_holders = {
+            attname: getattr(self, attname) for attname in self.HOLDER_FIELDS
+        }
+        self.loaded_summary = {
+            attname: getattr(self, attname) for attname in self.SUMMARY_FIELDS
+        }
 
         return saved
 
@@ -446,6 +779,16 @@ class Item(models.Model):
 
     class Meta:
         ordering = ["primary_id"]
+        indexes = [
+            # count_primary_id and the other lookups through ItemNotDeletedManager
+            models.Index(
+                fields=["primary_id"],
+                condition=Q(is_deleted=False),
+                name="libtekin_item_pid_active_idx",
+            ),
+            # On PostgreSQL, the identifier filters use the UPPER() expression
+            # indexes created by migrations 0065 and 0067
+        ]
 
     objects = ItemNotDeletedManager()
     all_objects = ItemAllManager()
@@ -480,6 +823,12 @@ class ItemAssignee(models.Model):
 
     class Meta:
         ordering = ["-when", "-pk"]
+        indexes = [
+            # the historical assignee filter looks up items by assignee
+            models.Index(
+                fields=["assignee", "item"], name="libtekin_itemassignee_who_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.assignee} -> {self.item}"
@@ -512,9 +861,187 @@ class ItemBorrower(models.Model):
 
     class Meta:
         ordering = ["-when", "-pk"]
+        indexes = [
+            # the historical borrower filter looks up items by borrower
+            models.Index(
+                fields=["borrower", "item"], name="libtekin_itemborrower_who_idx"
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.assignee} -> {self.item} "
+        return f"{self.borrower} -> {self.item}"
+
+
+class ItemSummaryQuerySet(models.QuerySet):
+    def summary_keys(self, values):
+        # Turns dicts of Item.SUMMARY_FIELDS values into ItemSummary keys, looking
+        # up every model's category in one query
+        mmodel_ids = {value["mmodel_id"] for value in values if value["mmodel_id"]}
+        categories = dict(
+            Mmodel.objects.filter(pk__in=mmodel_ids).values_list("pk", "category_id")
+        )
+        return [
+            (
+                value["status_id"],
+                categories.get(value["mmodel_id"]),
+                value["location_id"],
+                value["role_id"],
+                value["is_deleted"],
+            )
+            for value in values
+        ]
+
+    def add(self, key, delta):
+        status_id, category_id, location_id, role_id, is_deleted = key
+        rows = self.filter(
+            status_id=status_id,
+            category_id=category_id,
+            location_id=location_id,
+            role_id=role_id,
+            is_deleted=is_deleted,
+        )
+        pk = rows.values_list("pk", flat=True).first()
+        if pk is not None:
+            self.filter(pk=pk).update(count=F("count") + delta)
+        elif delta > 0:
+            self.create(
+                status_id=status_id,
+                category_id=category_id,
+                location_id=location_id,
+                role_id=role_id,
+                is_deleted=is_deleted,
+                count=delta,
+            )
+
+    def add_items(self, items, delta=1):
+        # For writes that bypass the Item signals, such as bulk_create
+        keys = self.summary_keys(
+            [
+                {attname: getattr(item, attname) for attname in Item.SUMMARY_FIELDS}
+                for item in items
+            ]
+        )
+        deltas = {}
+        for key in keys:
+            deltas[key] = deltas.get(key, 0) + delta
+        for key, key_delta in deltas.items():
+            self.add(key, key_delta)
+
+    def add_mmodel(self, mmodel_id, category_id, delta):
+        # Adds delta for each item of a model under category_id, for the model's
+        # category changing, which moves its items without Item signals
+        for row in (
+            Item.all_objects.filter(mmodel_id=mmodel_id)
+            .order_by()
+            .values("status_id", "location_id", "role_id", "is_deleted")
+            .annotate(count=Count("pk"))
+        ):
+            self.add(
+                (
+                    row["status_id"],
+                    category_id,
+                    row["location_id"],
+                    row["role_id"],
+                    row["is_deleted"],
+                ),
+                delta * row["count"],
+            )
+
+    def remove_related(self, dimension, pk):
+        # Deleting a status, category, location or role sets it to NULL on its
+        # items without signals, so its rows are counted under None instead
+        for row in self.filter(**{dimension + "_id": pk}):
+            key = {name: getattr(row, name + "_id") for name in self.DIMENSIONS}
+            key[dimension] = None
+            self.add(
+                (
+                    key["status"],
+                    key["category"],
+                    key["location"],
+                    key["role"],
+                    row.is_deleted,
+                ),
+                row.count,
+            )
+            self.filter(pk=row.pk).delete()
+
+    DIMENSIONS = ["status", "category", "location", "role"]
+
+    def totals(self, filters=None, include_deleted=False):
+        """
+        Returns {dimension: {id: count}} for each of DIMENSIONS from one read of
+        the summary rows, counting only the rows that match filters, a dict of
+        dimension ids
+        """
+
+        queryset = self.filter(count__gt=0)
+        if not include_deleted:
+            queryset = queryset.filter(is_deleted=False)
+        for dimension, value in (filters or {}).items():
+            queryset = queryset.filter(**{dimension + "_id": value})
+
+        totals = {dimension: {} for dimension in self.DIMENSIONS}
+        fields = [dimension + "_id" for dimension in self.DIMENSIONS]
+        for row in queryset.values(*fields, "count"):
+            for dimension in self.DIMENSIONS:
+                id = row[dimension + "_id"]
+                totals[dimension][id] = totals[dimension].get(id, 0) + row["count"]
+        return totals
+
+
+class ItemSummary(models.Model):
+    """
+    Item counts for every combination of status, model category, location, role
+    and deletion, kept up to date by the Item signals so dashboards read a few
+    rows instead of grouping every item.  The related rows are not constrained,
+    since deleting one moves its items without signals, and its counts are moved
+    by signals.py instead
+    """
+
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    category = models.ForeignKey(
+        MmodelCategory,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    role = models.ForeignKey(
+        Role,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    is_deleted = models.BooleanField(
+        "is deleted", default=False, help_text="If these items are deleted"
+    )
+    count = models.IntegerField(
+        "count", default=0, help_text="The number of items with these values"
+    )
+
+    objects = ItemSummaryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["is_deleted", "status", "category", "location", "role"],
+                name="libtekin_itemsummary_key_idx",
+            ),
+        ]
 
 
 class ItemNoteLevel(models.Model):
@@ -615,6 +1142,19 @@ class ItemNote(models.Model):
         ordering = [
             "-when",
         ]
+        indexes = [
+            # the note list pages through notes by (-when, -pk)
+            models.Index(
+                F("when").desc(),
+                F("id").desc(),
+                name="libtekin_itemnote_when_idx",
+            ),
+            # the flagged notes shown with each item in the item list
+            models.Index(
+                fields=["item", "flagged", "-when"],
+                name="libtekin_itemnote_flagged_idx",
+            ),
+        ]
 
 
 class History(models.Model):
@@ -651,20 +1191,49 @@ class History(models.Model):
         help_text="The user who made this change",
     )
 
+    # The relations read by the __str__ of the changed records, per model
+    OBJECT_RELATED = {
+        "ItemAssignee": ["item", "assignee"],
+        "ItemBorrower": ["item", "borrower"],
+        "ItemNote": ["item", "level", "itemnotecategory"],
+    }
+
     class Meta:
         ordering = ("-when", "modelname", "objectid")
 
+    @classmethod
+    def attach_objects(cls, histories):
+        """
+        Sets "object" on each of histories to the record it changed, with one
+        query per model instead of one per row
+        """
+        objectids = {}
+        for history in histories:
+            objectids.setdefault(history.modelname, set()).add(history.objectid)
+
+        for modelname, ids in objectids.items():
+            try:
+                model = apps.get_model("libtekin", modelname)
+            except LookupError:
+                continue
+            objects = model._base_manager.select_related(
+                *cls.OBJECT_RELATED.get(modelname, [])
+            ).in_bulk([objectid for objectid in ids if objectid is not None])
+            for history in histories:
+                if history.modelname == modelname:
+                    history.object = objects.get(history.objectid)
+
+        return histories
+
     def __str__(self):
         new_value_trunc = (
             self.new_value[:17:] + "..." if len(self.new_value) > 20 else self.new_value
         )
 
-        try:
-            model = apps.get_model("libtekin", self.modelname)
-            object = model.objects.get(pk=self.objectid)
+        # The changed record is shown once attach_objects() has loaded it, and
+        # otherwise its id, so that listing rows never queries once per row
+        object = getattr(self, "object", None)
+        if object is not None:
             return f'{self.when.strftime("%Y-%m-%d")}: {self.modelname}: [{object}] [{self.fieldname}] changed to "{new_value_trunc}"'
 
-        except Exception as e:
-            print(e)
-
-        return f'{"mdy".format(self.when.strftime("%Y-%m-%d"))}: {self.modelname}: {self.objectid} [{self.fieldname}] changed to "{new_value_trunc}"'
+        return f'{self.when.strftime("%Y-%m-%d")}: {self.modelname}: {self.objectid} [{self.fieldname}] changed to "{new_value_trunc}"'
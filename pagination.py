@@ -0,0 +1,206 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+def expand_ordering(model, term, depth=0):
+    # Replaces a term that names a relation with the related model's own ordering,
+    # the way order_by() does, so that each key is a concrete column we can seek on
+    descending = term.startswith("-")
+    path = term.lstrip("-")
+
+    current_model = model
+    field = None
+    for part in path.split("__"):
+        try:
+            field = current_model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return [(path, descending)]
+        if field.is_relation:
+            current_model = field.related_model
+
+    if field is None or not field.is_relation:
+        return [(path, descending)]
+
+    related_ordering = current_model._meta.ordering
+    if not related_ordering or depth > 2:
+        return [("{}__pk".format(path), descending)]
+
+    keys = []
+    for related_term in related_ordering:
+        related_descending = related_term.startswith("-") != descending
+        keys.extend(
+            expand_ordering(
+                model,
+                "{}{}__{}".format(
+                    "-" if related_descending else "", path, related_term.lstrip("-")
+                ),
+                depth + 1,
+            )
+        )
+    return keys
+
+
+def resolve_key(model, path):
+    # Returns the field at the end of path, or None for an annotation, and whether
+    # the key can be NULL, either in the column or through a nullable join
+    if path == "pk":
+        return model._meta.pk, False
+
+    current_model = model
+    field = None
+    nullable = False
+    for part in path.split("__"):
+        if part == "pk":
+            field = current_model._meta.pk
+            continue
+        try:
+            field = current_model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None, True
+        if field.is_relation:
+            if field.null or field.one_to_many or field.many_to_many:
+                nullable = True
+            current_model = field.related_model
+        elif field.null:
+            nullable = True
+    if field is not None and field.is_relation:
+        field = current_model._meta.pk
+    return field, nullable
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, has_previous):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Seek pagination: each page is fetched with a WHERE clause built from the sort
+    keys of the last row of the previous page, so its cost does not depend on how
+    deep into the list it is.  NULLs sort last when ascending and first when
+    descending, as in a default PostgreSQL index, and only nullable keys get a
+    NULLS clause, so that the ordering can be read from a plain index
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+
+        # pk always comes last, to break ties, in the direction it was asked for
+        self.keys = []
+        pk_descending = None
+        for term in ordering:
+            if not isinstance(term, str):
+                continue
+            for path, descending in expand_ordering(queryset.model, term):
+                if path == "pk":
+                    if pk_descending is None:
+                        pk_descending = descending
+                elif path not in [key[0] for key in self.keys]:
+                    self.keys.append((path, descending))
+        self.keys.append(("pk", bool(pk_descending)))
+
+        self.fields = []
+        self.nullable = []
+        for path, descending in self.keys:
+            field, nullable = resolve_key(queryset.model, path)
+            self.fields.append(field)
+            self.nullable.append(nullable)
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(
+            json.dumps(values, cls=DjangoJSONEncoder).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            return None
+
+        # A value of the wrong type would raise in the seek lookups
+        converted = []
+        for field, nullable, value in zip(self.fields, self.nullable, values):
+            if value is None:
+                if not nullable:
+                    return None
+            elif field is not None:
+                try:
+                    value = field.to_python(value)
+                except (ValidationError, ValueError, TypeError):
+                    return None
+            converted.append(value)
+        return converted
+
+    def ordered_queryset(self):
+        order_by = []
+        annotations = {}
+        for index, (path, descending) in enumerate(self.keys):
+            if not self.nullable[index]:
+                order_by.append(F(path).desc() if descending else F(path).asc())
+            elif descending:
+                order_by.append(F(path).desc(nulls_first=True))
+            else:
+                order_by.append(F(path).asc(nulls_last=True))
+            annotations["keyset_{}".format(index)] = F(path)
+        return self.queryset.annotate(**annotations).order_by(*order_by)
+
+    def seek_filter(self, values):
+        # (k0 after v0) OR (k0 = v0 AND k1 after v1) OR ...
+        seek = Q()
+        equal = Q()
+        for (path, descending), nullable, value in zip(
+            self.keys, self.nullable, values
+        ):
+            if value is None:
+                after = Q(**{"{}__isnull".format(path): False}) if descending else Q()
+                same = Q(**{"{}__isnull".format(path): True})
+            else:
+                lookup = "lt" if descending else "gt"
+                after = Q(**{"{}__{}".format(path, lookup): value})
+                if nullable and not descending:
+                    after = after | Q(**{"{}__isnull".format(path): True})
+                same = Q(**{path: value})
+
+            if after:
+                seek = seek | (equal & after)
+            equal = equal & same
+        return seek
+
+    def get_page(self, cursor=None):
+        queryset = self.ordered_queryset()
+        values = self.decode_cursor(cursor) if cursor else None
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values))
+
+        rows = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(
+                [
+                    getattr(last, "keyset_{}".format(index))
+                    for index in range(len(self.keys))
+                ]
+            )
+
+        return KeysetPage(rows, next_cursor, values is not None)
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Item
+
+SQLITE_SEARCH_TABLE = "libtekin_item_search"
+
+# Whether the SQLite full text table is installed, by database alias
+sqlite_search_installed = {}
+
+
+class SearchBackend:
+    """
+    Searches Item.search_document with a single LIKE.  On PostgreSQL the trigram
+    index created by migration 0066 serves this query when pg_trgm is available
+    """
+
+    def filter(self, queryset, value):
+        return queryset.filter(search_document__contains=value.lower())
+
+
+class SqliteSearchBackend(SearchBackend):
+    """
+    Searches an FTS5 trigram table that SQLite triggers keep in step with
+    search_document.  Trigrams need at least three characters, so shorter values
+    are searched with LIKE
+    """
+
+    def filter(self, queryset, value):
+        if len(value) < 3:
+            return super().filter(queryset, value)
+
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH %s",
+                ['"{}"'.format(value.lower().replace('"', '""'))],
+            )
+        )
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    if hasattr(settings, "LIBTEKIN_SEARCH_BACKEND"):
+        return import_string(settings.LIBTEKIN_SEARCH_BACKEND)()
+
+    if connections[using].vendor == "sqlite":
+        if using not in sqlite_search_installed:
+            install_sqlite_search(using=using)
+        if sqlite_search_installed[using]:
+            return SqliteSearchBackend()
+
+    return SearchBackend()
+
+
+def install_sqlite_search(using=DEFAULT_DB_ALIAS, **kwargs):
+    # Runs after migrate as well as on first use, because SQLite drops the triggers
+    # whenever a migration rebuilds the item table
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+
+    table = Item._meta.db_table
+    triggers = {
+        f"{SQLITE_SEARCH_TABLE}_insert": f"""
+            AFTER INSERT ON {table} BEGIN
+                INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, search_document)
+                VALUES (new.id, new.search_document);
+            END""",
+        f"{SQLITE_SEARCH_TABLE}_delete": f"""
+            AFTER DELETE ON {table} BEGIN
+                INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, search_document)
+                VALUES ('delete', old.id, old.search_document);
+            END""",
+        f"{SQLITE_SEARCH_TABLE}_update": f"""
+            AFTER UPDATE OF search_document ON {table} BEGIN
+                INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, search_document)
+                VALUES ('delete', old.id, old.search_document);
+                INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, search_document)
+                VALUES (new.id, new.search_document);
+            END""",
+    }
+
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            sqlite_search_installed[using] = False
+            return
+
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s OR type = 'trigger'",
+            [SQLITE_SEARCH_TABLE],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+        if SQLITE_SEARCH_TABLE not in existing:
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {SQLITE_SEARCH_TABLE} USING fts5("
+                    f"search_document, content='{table}', content_rowid='id', "
+                    "tokenize='trigram')"
+                )
+            except OperationalError:
+                # FTS5 or its trigram tokenizer (SQLite 3.34) is not available
+                sqlite_search_installed[using] = False
+                return
+
+        missing = [name for name in triggers if name not in existing]
+        for name in missing:
+            cursor.execute(f"CREATE TRIGGER {name} {triggers[name]}")
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')"
+            )
+
+    sqlite_search_installed[using] = True
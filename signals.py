@@ -0,0 +1,182 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from spl_members.models import Member
+
+from .choices import clear_choice_table
+from .models import (
+    Item,
+    ItemNote,
+    ItemNoteCategory,
+    ItemNoteLevel,
+    ItemSummary,
+    Location,
+    Mmodel,
+    MmodelCategory,
+    Role,
+    Status,
+    clear_default_pks,
+)
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+@receiver(post_save, sender=ItemNoteLevel)
+@receiver(post_delete, sender=ItemNoteLevel)
+def clear_defaults(sender, **kwargs):
+    clear_default_pks()
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+def clear_item_choices(sender, **kwargs):
+    # the item version also keys ItemList's cached counts, which filter on status
+    clear_choice_table("item")
+
+
+@receiver(post_save, sender=ItemNote)
+@receiver(post_delete, sender=ItemNote)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=ItemNoteLevel)
+@receiver(post_delete, sender=ItemNoteCategory)
+def clear_itemnote_counts(sender, **kwargs):
+    # the itemnote version keys ItemNoteList's cached counts.  Deleting an item,
+    # level or category sets it to NULL on its notes without signals
+    clear_choice_table("itemnote")
+
+
+@receiver(post_save, sender=Mmodel)
+@receiver(post_delete, sender=Mmodel)
+def clear_mmodel_choices(sender, **kwargs):
+    # item options show their model
+    clear_choice_table("item", "mmodel")
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def clear_member_choices(sender, **kwargs):
+    clear_choice_table("member")
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def clear_location_choices(sender, **kwargs):
+    clear_choice_table("location")
+
+
+@receiver(post_save, sender=Mmodel)
+def update_mmodel_search_documents(sender, instance, created, **kwargs):
+    if not created:
+        Item.all_objects.filter(mmodel=instance).update_search_documents()
+
+
+@receiver(post_save, sender=Member)
+def update_member_search_documents(sender, instance, created, **kwargs):
+    if not created:
+        Item.all_objects.filter(assignee=instance).update_search_documents()
+
+
+@receiver(pre_save, sender=Item)
+def load_item_summary(sender, instance, update_fields, **kwargs):
+    # Items that were not loaded with every summary field, such as ones built with
+    # a pk, read their saved values so the old summary row can be found
+    if instance.pk is None or instance._state.adding:
+        return
+    if update_fields is not None and not summary_fields_updated(update_fields):
+        return
+    loaded = getattr(instance, "loaded_summary", {})
+    if len(loaded) < len(Item.SUMMARY_FIELDS):
+        instance.loaded_summary = (
+            Item.all_objects.filter(pk=instance.pk)
+            .values(*Item.SUMMARY_FIELDS)
+            .first()
+        )
+
+
+def summary_fields_updated(update_fields):
+    return any(
+        attname in update_fields or attname[:-3] in update_fields
+        for attname in Item.SUMMARY_FIELDS
+    )
+
+
+@receiver(post_save, sender=Item)
+def update_item_summary(sender, instance, created, update_fields, **kwargs):
+    if update_fields is not None and not summary_fields_updated(update_fields):
+        return
+
+    current = {attname: getattr(instance, attname) for attname in Item.SUMMARY_FIELDS}
+    loaded = None if created else getattr(instance, "loaded_summary", None)
+    if loaded == current:
+        return
+
+    if loaded:
+        old_key, new_key = ItemSummary.objects.summary_keys([loaded, current])
+        ItemSummary.objects.add(old_key, -1)
+    else:
+        (new_key,) = ItemSummary.objects.summary_keys([current])
+    ItemSummary.objects.add(new_key, 1)
+
+
+@receiver(post_delete, sender=Item)
+def remove_item_summary(sender, instance, **kwargs):
+    ItemSummary.objects.add_items([instance], -1)
+
+
+def category_updated(update_fields):
+    return update_fields is None or bool(
+        {"category", "category_id"} & set(update_fields)
+    )
+
+
+@receiver(pre_save, sender=Mmodel)
+def load_mmodel_category(sender, instance, update_fields, **kwargs):
+    # The saved category, rather than the one the instance was loaded with, which
+    # a deleted category may have changed since
+    if instance.pk is None or instance._state.adding:
+        return
+    if not category_updated(update_fields):
+        return
+    instance.loaded_category_id = (
+        Mmodel.objects.filter(pk=instance.pk)
+        .values_list("category_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Mmodel)
+def move_mmodel_summary(sender, instance, created, update_fields, **kwargs):
+    if created or not category_updated(update_fields):
+        return
+    if not hasattr(instance, "loaded_category_id"):
+        return
+    loaded = instance.loaded_category_id
+    if loaded != instance.category_id:
+        with transaction.atomic():
+            ItemSummary.objects.add_mmodel(instance.pk, loaded, -1)
+            ItemSummary.objects.add_mmodel(instance.pk, instance.category_id, 1)
+
+
+@receiver(pre_delete, sender=Mmodel)
+def remove_mmodel_summary(sender, instance, **kwargs):
+    # Before the model's items are set to NULL, which moves them to no category
+    category_id = (
+        Mmodel.objects.filter(pk=instance.pk)
+        .values_list("category_id", flat=True)
+        .first()
+    )
+    if category_id is not None:
+        ItemSummary.objects.add_mmodel(instance.pk, category_id, -1)
+        ItemSummary.objects.add_mmodel(instance.pk, None, 1)
+
+
+@receiver(post_delete, sender=MmodelCategory)
+@receiver(post_delete, sender=Status)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Role)
+def remove_related_summary(sender, instance, **kwargs):
+    dimension = "category" if sender is MmodelCategory else sender.__name__.lower()
+    ItemSummary.objects.remove_related(dimension, instance.pk)
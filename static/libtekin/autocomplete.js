@@ -0,0 +1,83 @@
+// Searches the endpoint named by data-autocomplete-url as the user types, and
+// fills the select with the results, keeping the selected option
+function libtekinAutocomplete(select) {
+  if (select.dataset.autocompleteReady) {
+    return
+  }
+  select.dataset.autocompleteReady = "1"
+
+  let input = document.createElement("input")
+  input.type = "search"
+  input.placeholder = "Search"
+  input.className = "autocomplete_input"
+  select.parentNode.insertBefore(input, select)
+
+  let more = document.createElement("button")
+  more.type = "button"
+  more.textContent = "More"
+  more.className = "autocomplete_more"
+  more.style.display = "none"
+  select.parentNode.insertBefore(more, select.nextSibling)
+
+  let page = 1
+  let timer = null
+
+  function load(append) {
+    const xhttp = new XMLHttpRequest();
+    xhttp.onreadystatechange = function() {
+      if (this.readyState == 4 && this.status == 200) {
+        let data = JSON.parse(this.responseText)
+        if (!append) {
+          for (let option of Array.from(select.options)) {
+            if (option.value && !option.selected) {
+              option.remove()
+            }
+          }
+        }
+        for (let result of data.results) {
+          if (!select.querySelector('option[value="' + result.id + '"]')) {
+            select.add(new Option(result.text, result.id))
+          }
+        }
+        more.style.display = data.more ? "" : "none"
+      }
+    };
+    let url = new URL(select.dataset.autocompleteUrl, window.location.href)
+    url.searchParams.set("q", input.value)
+    url.searchParams.set("page", page)
+    xhttp.open("GET", url);
+    xhttp.send();
+  }
+
+  input.addEventListener("input", function() {
+    clearTimeout(timer)
+    timer = setTimeout(function() {
+      page = 1
+      load(false)
+    }, 250)
+  })
+  more.addEventListener("click", function() {
+    page = page + 1
+    load(true)
+  })
+}
+
+function libtekinAutocompleteAll(element) {
+  for (let select of element.querySelectorAll("select[data-autocomplete-url]")) {
+    libtekinAutocomplete(select)
+  }
+}
+
+document.addEventListener("DOMContentLoaded", function() {
+  libtekinAutocompleteAll(document)
+  // formset rows added after the page loads
+  new MutationObserver(function(mutations) {
+    for (let mutation of mutations) {
+      for (let node of mutation.addedNodes) {
+        if (node.nodeType == Node.ELEMENT_NODE) {
+          libtekinAutocompleteAll(node)
+        }
+      }
+    }
+  }).observe(document.body, { childList: true, subtree: true })
+})
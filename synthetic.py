@@ -0,0 +1,163 @@
+import random
+from datetime import date, timedelta
+
+from spl_members.models import Member
+
+from .choices import clear_choice_table
+from .models import (
+    Entity,
+    History,
+    Item,
+    ItemAssignee,
+    ItemNote,
+    ItemNoteCategory,
+    ItemNoteLevel,
+    ItemSummary,
+    Location,
+    Mmodel,
+    MmodelCategory,
+    Role,
+    Status,
+    clear_default_pks,
+)
+
+
+def build_inventory(
+    size, notes_per_item=2, history_per_item=2, seed=0, batch_size=5000
+):
+    """
+    Fills the database with a synthetic inventory of "size" items, with their
+    assignment history, notes and change history, for tests and benchmarks.
+    Returns the reference objects and the primary ids that were created
+    """
+
+    rng = random.Random(seed)
+    clear_default_pks()
+
+    statuses = [
+        Status.objects.create(name="Active", is_active=True, is_default=True),
+        Status.objects.create(name="In Repair", is_active=True, list_position=2000),
+        Status.objects.create(name="Retired", list_position=3000),
+    ]
+    categories = [
+        MmodelCategory.objects.create(name=name, sort_name=name)
+        for name in [
+            "Laptop Computer",
+            "Desktop Computer",
+            "Monitor",
+            "Phone",
+            "Printer",
+        ]
+    ]
+    mmodels = Mmodel.objects.bulk_create(
+        [
+            Mmodel(
+                brand=f"Brand {number % 7}",
+                model_name=f"Model {number}",
+                category=categories[number % len(categories)],
+                primary_id_field="serial_number",
+            )
+            for number in range(50)
+        ]
+    )
+    locations = Location.objects.bulk_create(
+        [
+            Location(full_name=f"Location {number}", short_name=f"L{number}")
+            for number in range(20)
+        ]
+    )
+    roles = Role.objects.bulk_create(
+        [Role(name=name, sort_name=name) for name in ["Staff", "Public", "Facility"]]
+    )
+    entities = Entity.objects.bulk_create(
+        [Entity(full_name=f"Entity {number}") for number in range(5)]
+    )
+    members = Member.objects.bulk_create(
+        [Member(name_full=f"Member {number}") for number in range(200)]
+    )
+    levels = [
+        ItemNoteLevel.objects.create(name="Info", number=0),
+        ItemNoteLevel.objects.create(name="Critical", number=5),
+    ]
+    notecategories = ItemNoteCategory.objects.bulk_create(
+        [ItemNoteCategory(name=name) for name in ["Repair", "Inventory", "Other"]]
+    )
+
+    primary_ids = []
+    for start in range(0, size, batch_size):
+        items = []
+        for number in range(start, min(start + batch_size, size)):
+            item = Item(
+                common_name=f"Item {number}" if number % 3 else "",
+                mmodel=rng.choice(mmodels),
+                primary_id_field="serial_number",
+                serial_number=f"SN{number:08d}",
+                asset_number=f"A{number:08d}",
+                barcode=f"3{number:012d}",
+                network_name=f"LIB-{number:06d}",
+                status=statuses[0] if rng.random() < 0.8 else rng.choice(statuses),
+                role=rng.choice(roles),
+                owner=rng.choice(entities),
+                assignee=rng.choice(members) if rng.random() < 0.7 else None,
+                borrower=rng.choice(members) if rng.random() < 0.2 else None,
+                home=rng.choice(locations),
+                location=rng.choice(locations),
+                latest_inventory=date(2024, 1, 1) + timedelta(days=number % 365),
+                is_deleted=rng.random() < 0.05,
+            )
+            item.set_primary_id()
+            item.search_document = item.build_search_document()
+            items.append(item)
+        Item.objects.bulk_create(items)
+        ItemSummary.objects.add_items(items)
+        primary_ids.extend(item.primary_id for item in items)
+
+        ItemAssignee.objects.bulk_create(
+            [
+                ItemAssignee(item=item, assignee=rng.choice(members))
+                for item in items
+                for count in range(history_per_item)
+            ]
+        )
+        ItemNote.objects.bulk_create(
+            [
+                ItemNote(
+                    item=item,
+                    when=date(2024, 1, 1) + timedelta(days=rng.randrange(365)),
+                    level=rng.choice(levels),
+                    itemnotecategory=rng.choice(notecategories),
+                    maintext=f"Note {count} for {item.primary_id}",
+                    flagged=1 if rng.random() < 0.1 else 0,
+                )
+                for item in items
+                for count in range(notes_per_item)
+            ]
+        )
+        History.objects.bulk_create(
+            [
+                History(
+                    modelname="Item",
+                    objectid=item.pk,
+                    fieldname="location",
+                    old_value=None,
+                    new_value=str(item.location_id),
+                )
+                for item in items
+                for count in range(history_per_item)
+            ]
+        )
+
+    clear_choice_table("item", "mmodel", "member", "location")
+
+    return {
+        "statuses": statuses,
+        "categories": categories,
+        "mmodels": mmodels,
+        "locations": locations,
+        "roles": roles,
+        "entities": entities,
+        "members": members,
+        "levels": levels,
+        "notecategories": notecategories,
+        "primary_ids": primary_ids,
+    }
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from libtekin.choices import clear_choice_table
+from libtekin.forms import ItemAssigneeFormset, ItemForm, ItemNoteForm
+from libtekin.models import Item, ItemAssignee, Mmodel
+from spl_members.models import Member
+
+
+class LazyInlineFormSetTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = [Member.objects.create(name_full=f"Member {n}") for n in range(5)]
+        cls.item = Item.objects.create(common_name="Laptop")
+        for member in cls.members:
+            ItemAssignee.objects.create(item=cls.item, assignee=member)
+
+    def test_no_extra_forms(self):
+        formset = ItemAssigneeFormset(instance=self.item)
+        self.assertEqual(len(formset.forms), len(self.members))
+
+    def test_choices_shared(self):
+        with CaptureQueriesContext(connection) as queries:
+            formset = ItemAssigneeFormset(instance=self.item)
+            str(formset)
+        # one query for the assignments and one for the selected members
+        self.assertEqual(len(queries), 2)
+
+    def test_extra_form(self):
+        formset = ItemAssigneeFormset(instance=self.item)
+        form = formset.extra_form(7)
+        self.assertEqual(form.prefix, formset.add_prefix(7))
+        self.assertIn("DELETE", form.fields)
+        self.assertIn(f'name="{formset.prefix}-7-assignee"', str(form))
+
+
+class AutocompleteSelectTestCase(TestCase):
+
+    def test_invalid_selection(self):
+        form = ItemForm({"mmodel": "abc", "connected_to": "1.5"})
+        self.assertIn("mmodel", form.errors)
+        self.assertIn('name="mmodel"', str(form["mmodel"]))
+        self.assertIn('name="connected_to"', str(form["connected_to"]))
+
+
+class ChoiceTableSelectTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mmodels = [
+            Mmodel.objects.create(brand="Dell", model_name=f"Latitude {n}") for n in range(3)
+        ]
+        cls.items = [
+            Item.objects.create(
+                common_name=f"Laptop {n}",
+                mmodel=cls.mmodels[n % 3],
+                primary_id_field="serial_number",
+                serial_number=f"SN{n}",
+            )
+            for n in range(20)
+        ]
+
+    def setUp(self):
+        clear_choice_table("item", "mmodel")
+
+    def test_one_query(self):
+        # the ItemNote the form builds looks up its default level, so only the
+        # render is counted
+        form = ItemNoteForm(initial={"item": self.items[4].pk})
+        with self.assertNumQueries(1):
+            html = str(form["item"])
+        self.assertEqual(html.count("data-textforfilter"), len(self.items))
+        self.assertIn(
+            f'value="{self.items[4].pk}" selected data-textforfilter="Dell Latitude 1 SN4"',
+            html,
+        )
+
+    def test_invalidated_on_save(self):
+        str(ItemNoteForm()["item"])
+        self.mmodels[1].model_name = "Precision"
+        self.mmodels[1].save()
+        self.assertIn("Dell Precision SN4", str(ItemNoteForm()["item"]))
@@ -0,0 +1,55 @@
+import io
+
+from django.test import TestCase
+
+from libtekin.imports import ItemImporter
+from libtekin.models import (
+    History,
+    Item,
+    ItemAssignee,
+    Location,
+    Mmodel,
+    Status,
+    clear_default_pks,
+)
+from spl_members.models import Member
+
+
+class ItemImporterTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        clear_default_pks()
+        cls.member_1 = Member.objects.create(name_full="member_1")
+        cls.mmodel_1 = Mmodel.objects.create(brand="Dell", model_name="Latitude 3390")
+        cls.location_1 = Location.objects.create(
+            full_name="Morgan Memorial Library", short_name="MML"
+        )
+        cls.status_1 = Status.objects.create(name="Active", is_active=True)
+
+    def test_import(self):
+        file = io.StringIO(
+            "common_name,mmodel,primary_id_field,serial_number,status,assignee,location,latest_inventory\n"
+            "laptop 1,Dell Latitude 3390,serial_number,SN1,Active,member_1,MML,2024-01-02\n"
+            "laptop 2,Latitude 3390,serial_number,SN2,Active,,Morgan Memorial Library,\n"
+            "laptop 3,Unknown Model,serial_number,SN3,Active,,,\n"
+            "laptop 4,,serial_number,SN4,,,,01/02/2024\n"
+        )
+        importer = ItemImporter(batch_size=1)
+        importer.run(file)
+
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual([error[0] for error in importer.errors], [4, 5])
+
+        item_1 = Item.objects.get(primary_id="SN1")
+        self.assertEqual(item_1.mmodel, self.mmodel_1)
+        self.assertEqual(item_1.location, self.location_1)
+        self.assertEqual(item_1.status, self.status_1)
+        self.assertEqual(item_1.assignee, self.member_1)
+        self.assertEqual(ItemAssignee.objects.filter(item=item_1).count(), 1)
+        self.assertTrue(
+            History.objects.filter(
+                objectid=item_1.pk, fieldname="serial_number"
+            ).exists()
+        )
+        self.assertEqual(Item.objects.get(primary_id="SN2").latest_inventory, None)
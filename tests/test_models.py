@@ -1,20 +1,28 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
 from django.db import models
 
 from libtekin.models import (
+    DEFAULT_PKS_VERSION_KEY,
     Entity,
     EntityCategory,
+    History,
     Item,
     ItemAssignee,
     ItemBorrower,
     ItemNote,
     ItemNoteCategory,
     ItemNoteLevel,
+    ItemSummary,
     Location,
     LocationCategory,
     Mmodel,
     MmodelCategory,
+    Role,
     Status,
+    get_default_status,
 )
 from spl_members.models import Member
 
@@ -68,3 +76,208 @@ class GeneralModelTestCase(TestCase):
         item_borrower_1 = ItemBorrower.objects.first()
         self.assertEqual(item_borrower_1.item, self.item_1)
         self.assertEqual(item_borrower_1.borrower, self.item_1.borrower)
+
+    def test_item_borrower_history(self):
+        item_borrower_1 = ItemBorrower.objects.first()
+        self.assertEqual(str(item_borrower_1), "member_2 -> item_1")
+        history = History.objects.create(
+            modelname="ItemBorrower",
+            objectid=item_borrower_1.pk,
+            fieldname="borrower",
+            new_value="member_2",
+        )
+        self.assertIn(f": {item_borrower_1.pk} [borrower]", str(history))
+        History.attach_objects([history])
+        self.assertIn("[member_2 -> item_1] [borrower]", str(history))
+
+    def test_item_resave_without_holder_change(self):
+        item = Item.objects.get(pk=self.item_1.pk)
+        item.common_name = "item_1 renamed"
+        item.save()
+        self.assertEqual(ItemAssignee.objects.filter(item=item).count(), 1)
+        self.assertEqual(ItemBorrower.objects.filter(item=item).count(), 1)
+
+    def test_item_resave_with_deferred_holders(self):
+        item = Item.objects.only("common_name").get(pk=self.item_1.pk)
+        item.common_name = "item_1 renamed"
+        item.save()
+        item = Item.objects.defer("assignee").get(pk=self.item_1.pk)
+        item.save()
+        self.assertEqual(ItemAssignee.objects.filter(item=item).count(), 1)
+        self.assertEqual(ItemBorrower.objects.filter(item=item).count(), 1)
+
+    def test_item_holder_change_recorded(self):
+        item = Item.objects.get(pk=self.item_1.pk)
+        item.assignee = self.member_2
+        item.save()
+        self.assertEqual(ItemAssignee.objects.filter(item=item).count(), 2)
+        self.assertEqual(
+            ItemAssignee.objects.filter(item=item, assignee=self.member_2).count(), 1
+        )
+        self.assertEqual(ItemBorrower.objects.filter(item=item).count(), 1)
+
+    def test_item_summary_follows_item(self):
+        status = Status.objects.create(name="status_1")
+        totals = ItemSummary.objects.totals()
+        self.assertEqual(sum(totals["status"].values()), 1)
+
+        item = Item.objects.get(pk=self.item_1.pk)
+        item.status = status
+        item.save()
+        totals = ItemSummary.objects.totals()
+        self.assertEqual(totals["status"], {status.pk: 1})
+
+        item.is_deleted = True
+        item.save()
+        self.assertEqual(ItemSummary.objects.totals()["status"], {})
+        self.assertEqual(
+            ItemSummary.objects.totals(include_deleted=True)["status"], {status.pk: 1}
+        )
+
+        item.delete()
+        self.assertEqual(
+            ItemSummary.objects.totals(include_deleted=True)["status"], {}
+        )
+
+    def test_current_status_notes(self):
+        level = ItemNoteLevel.objects.create(name="level_1", number=0)
+        for number, flagged in enumerate([1, 0, 1]):
+            ItemNote.objects.create(
+                item=self.item_1,
+                level=level,
+                when=None if number == 2 else date(2024, 1, 1 + number),
+                flagged=flagged,
+                maintext=f"note_{number}",
+            )
+        expected = ["2024-01-01: note_0", "note_2"]
+        self.assertEqual(self.item_1.get_current__status_notes(), expected)
+
+        with self.assertNumQueries(2):
+            item = Item.objects.with_status_notes().get(pk=self.item_1.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(item.get_current__status_notes(), expected)
+
+    def test_connected_tree(self):
+        retired = Status.objects.create(name="retired")
+        monitor = Item.objects.create(common_name="monitor", connected_to=self.item_1)
+        dock = Item.objects.create(
+            common_name="dock", connected_to=self.item_1, assignee=self.member_1
+        )
+        keyboard = Item.objects.create(common_name="keyboard", connected_to=dock)
+
+        with self.assertNumQueries(1):
+            tree = self.item_1.get_attached_tree()
+        self.assertEqual(tree, [(monitor, 1), (dock, 1), (keyboard, 2)])
+        self.assertEqual(keyboard.get_connection_chain(), [dock, self.item_1])
+
+        Item.all_objects.connected_tree(dock).update_connected(status=retired)
+        self.assertEqual(set(Item.objects.filter(status=retired)), {dock, keyboard})
+        self.assertEqual(ItemSummary.objects.totals()["status"][retired.pk], 2)
+        # the holders and their history are left alone
+        self.assertEqual(Item.objects.get(pk=dock.pk).assignee, self.member_1)
+        self.assertEqual(ItemAssignee.objects.filter(item=dock).count(), 1)
+        with self.assertRaises(ValueError):
+            Item.all_objects.connected_tree(dock).update_connected(
+                assignee=self.member_1
+            )
+
+    def test_history_objects(self):
+        level = ItemNoteLevel.objects.create(name="level_1", number=0)
+        category = ItemNoteCategory.objects.create(name="category_1")
+        for number in range(10):
+            note = ItemNote.objects.create(
+                item=self.item_1,
+                level=level,
+                itemnotecategory=category,
+                maintext=f"note_{number}",
+            )
+            History.objects.create(
+                modelname="ItemNote",
+                objectid=note.pk,
+                fieldname="maintext",
+                new_value=note.maintext,
+            )
+        History.objects.create(
+            modelname="Item", objectid=self.item_1.pk, fieldname="common_name"
+        )
+
+        # one query for the rows, and one for each model changed
+        with self.assertNumQueries(3):
+            histories = History.attach_objects(list(History.objects.all()))
+            rendered = [str(history) for history in histories]
+        for history, text in zip(histories, rendered):
+            if history.modelname == "ItemNote":
+                self.assertIn(f"level_1: category_1: {history.new_value}]", text)
+            else:
+                self.assertIn("[item_1]", text)
+        # without attach_objects(), the rows show the ids and don't query
+        history = History.objects.get(modelname="Item")
+        with self.assertNumQueries(0):
+            self.assertIn(f": {self.item_1.pk} [common_name]", str(history))
+
+    def test_default_status_follows_changes(self):
+        first = Status.objects.create(name="first", is_default=True)
+        self.assertEqual(get_default_status(), first.pk)
+        with self.assertNumQueries(0):
+            get_default_status()
+
+        first.is_default = False
+        first.save()
+        second = Status.objects.create(name="second", is_default=True)
+        self.assertEqual(get_default_status(), second.pk)
+
+        # A change made by another process, which only changes the shared version
+        Status.objects.filter(pk=second.pk).update(is_default=False)
+        Status.objects.filter(pk=first.pk).update(is_default=True)
+        cache.delete(DEFAULT_PKS_VERSION_KEY)
+        self.assertEqual(get_default_status(), first.pk)
+        self.assertEqual(Item.objects.create(common_name="new").status_id, first.pk)
+
+    def test_item_summary_follows_related_changes(self):
+        def expected():
+            totals = {"status": {}, "category": {}, "location": {}, "role": {}}
+            for item in Item.all_objects.select_related("mmodel"):
+                ids = {
+                    "status": item.status_id,
+                    "category": item.mmodel and item.mmodel.category_id,
+                    "location": item.location_id,
+                    "role": item.role_id,
+                }
+                for dimension, id in ids.items():
+                    totals[dimension][id] = totals[dimension].get(id, 0) + 1
+            return totals
+
+        laptops = MmodelCategory.objects.create(name="laptops")
+        phones = MmodelCategory.objects.create(name="phones")
+        mmodel = Mmodel.objects.create(
+            brand="Dell", model_name="3390", category=laptops
+        )
+        status = Status.objects.create(name="status_1")
+        role = Role.objects.create(name="role_1")
+        for number in range(3):
+            Item.objects.create(
+                common_name=f"laptop_{number}", mmodel=mmodel, status=status, role=role
+            )
+        self.assertEqual(ItemSummary.objects.totals(include_deleted=True), expected())
+
+        # a change that leaves the category alone leaves the summary rows alone
+        rows = list(ItemSummary.objects.order_by("pk").values_list("pk", "count"))
+        mmodel = Mmodel.objects.get(pk=mmodel.pk)
+        mmodel.model_name = "3390 2-in-1"
+        mmodel.save()
+        self.assertEqual(
+            list(ItemSummary.objects.order_by("pk").values_list("pk", "count")), rows
+        )
+
+        mmodel.category = phones
+        mmodel.save()
+        self.assertEqual(ItemSummary.objects.totals(include_deleted=True), expected())
+        self.assertEqual(
+            ItemSummary.objects.totals()["category"], {phones.pk: 3, None: 1}
+        )
+
+        for deleted in [status, role, phones, mmodel]:
+            deleted.delete()
+            self.assertEqual(
+                ItemSummary.objects.totals(include_deleted=True), expected()
+            )
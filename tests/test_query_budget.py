@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from libtekin.choices import clear_choice_table
+from libtekin.models import (
+    Item,
+    ItemAssignee,
+    ItemBorrower,
+    ItemNote,
+    ItemNoteCategory,
+    ItemNoteLevel,
+    clear_default_pks,
+)
+from libtekin.synthetic import build_inventory
+from spl_members.models import Member
+
+
+def get_sizes():
+    # Set LIBTEKIN_QUERY_BUDGET_SIZES to (100, 1000, 10000) for a slower, wider check
+    if hasattr(settings, "LIBTEKIN_QUERY_BUDGET_SIZES"):
+        return sorted(settings.LIBTEKIN_QUERY_BUDGET_SIZES)
+    return [100, 1000]
+
+
+def first_item(inventory):
+    return Item.objects.order_by("pk").first()
+
+
+# The views guarded against N+1 regressions, with the URL each is requested at
+VIEWS = {
+    "item-list": lambda inventory: reverse("libtekin:item-list"),
+    "item-detail": lambda inventory: reverse(
+        "libtekin:item-detail", kwargs={"pk": first_item(inventory).pk}
+    ),
+    "item-csv": lambda inventory: reverse("libtekin:item-csv"),
+    "mmodel-detail": lambda inventory: reverse(
+        "libtekin:mmodel-detail", kwargs={"pk": inventory["mmodels"][0].pk}
+    ),
+    "location-detail": lambda inventory: reverse(
+        "libtekin:location-detail", kwargs={"pk": inventory["locations"][0].pk}
+    ),
+    "itemnote-list": lambda inventory: reverse("libtekin:itemnote-list"),
+    "mmodel-list-sorted": lambda inventory: reverse("libtekin:mmodel-list")
+    + "?sort=-item_count",
+    "location-list-sorted": lambda inventory: reverse("libtekin:location-list")
+    + "?sort=active_item_count",
+}
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Requests each view against inventories of every size and expects the same
+    number of queries from all of them
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def request(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        else:
+            response.content
+
+    def count_request(self, url):
+        clear_default_pks()
+        clear_choice_table("item", "mmodel", "member", "location", "itemnote")
+        # the first request fills the caches that every request shares
+        self.request(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.request(url)
+        return len(queries)
+
+    def count_queries(self, size):
+        counts = {}
+        with transaction.atomic():
+            inventory = build_inventory(size, notes_per_item=2, history_per_item=2)
+            for name, url in VIEWS.items():
+                counts[name] = self.count_request(url(inventory))
+            transaction.set_rollback(True)
+        return counts
+
+    def test_query_counts_constant(self):
+        sizes = get_sizes()
+        budget = self.count_queries(sizes[0])
+        for size in sizes[1:]:
+            counts = self.count_queries(size)
+            for name in VIEWS:
+                with self.subTest(view=name, size=size):
+                    self.assertEqual(
+                        counts[name],
+                        budget[name],
+                        f"{name} made {counts[name]} queries with {size} items "
+                        f"and {budget[name]} with {sizes[0]}",
+                    )
+
+    def test_item_detail_constant(self):
+        # an item's notes, assignments and loans don't add queries
+        level = ItemNoteLevel.objects.create(name="Info", number=0)
+        category = ItemNoteCategory.objects.create(name="Repair")
+        members = [Member.objects.create(name_full=f"Member {n}") for n in range(3)]
+        counts = []
+        for size in [1, 40]:
+            item = Item.objects.create(common_name=f"Item with {size}")
+            for number in range(size):
+                member = members[number % len(members)]
+                ItemNote.objects.create(
+                    item=item,
+                    level=level,
+                    itemnotecategory=category,
+                    maintext=f"Note {number}",
+                )
+                ItemAssignee.objects.create(item=item, assignee=member)
+                ItemBorrower.objects.create(item=item, borrower=member)
+            counts.append(
+                self.count_request(
+                    reverse("libtekin:item-detail", kwargs={"pk": item.pk})
+                )
+            )
+        self.assertEqual(counts[0], counts[1])
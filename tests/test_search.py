@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from libtekin.filterset import ItemFilter
+from libtekin.models import Item, Mmodel
+from spl_members.models import Member
+
+
+class CombinedTextSearchTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mmodel_1 = Mmodel.objects.create(brand="Dell", model_name="Latitude 3390")
+        cls.member_1 = Member.objects.create(name_full="Benjamin Goldberg")
+        cls.item_1 = Item.objects.create(
+            common_name="Ben's Laptop",
+            mmodel=cls.mmodel_1,
+            serial_number="ABC123",
+            assignee=cls.member_1,
+        )
+        cls.item_2 = Item.objects.create(common_name="Printer", serial_number="XYZ789")
+
+    def search(self, value):
+        return list(
+            ItemFilter({"combined_text_search": value}, queryset=Item.objects.all()).qs
+        )
+
+    def test_search_document(self):
+        self.assertIn("latitude 3390", self.item_1.search_document)
+        self.assertIn("benjamin goldberg", self.item_1.search_document)
+
+    def test_search(self):
+        self.assertEqual(self.search("abc123"), [self.item_1])
+        self.assertEqual(self.search("Latitude"), [self.item_1])
+        self.assertEqual(self.search("goldberg"), [self.item_1])
+        self.assertEqual(self.search("xy"), [self.item_2])
+        self.assertEqual(self.search("nothing like this"), [])
+
+    def test_related_rename(self):
+        self.mmodel_1.model_name = "Latitude 5400"
+        self.mmodel_1.save()
+        self.assertEqual(self.search("5400"), [self.item_1])
@@ -0,0 +1,325 @@
+import base64
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from libtekin.choices import clear_choice_table
+from libtekin.filterset import ItemFilter
+from libtekin.models import (
+    History,
+    Item,
+    ItemAssignee,
+    ItemBorrower,
+    ItemNote,
+    ItemNoteLevel,
+    Location,
+    Mmodel,
+)
+from spl_members.models import Member
+
+
+class AutocompleteTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        for number in range(30):
+            Mmodel.objects.create(brand="Dell", model_name=f"Latitude {number:02d}")
+        Mmodel.objects.create(brand="HP", model_name="EliteBook")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        clear_choice_table("mmodel")
+
+    def get(self, **params):
+        return self.client.get(reverse("libtekin:autocomplete-mmodel"), params).json()
+
+    def test_prefix(self):
+        data = self.get(q="hp")
+        self.assertEqual([result["text"] for result in data["results"]], ["HP EliteBook"])
+        self.assertFalse(data["more"])
+
+    def test_phrase(self):
+        data = self.get(q="latitude 07")
+        self.assertEqual([result["text"] for result in data["results"]], ["Dell Latitude 07"])
+
+    def test_words(self):
+        data = self.get(q="dell lat")
+        self.assertEqual(len(data["results"]), 20)
+        self.assertEqual(self.get(q="dell elite")["results"], [])
+
+    def test_pages(self):
+        first = self.get(q="dell")
+        second = self.get(q="dell", page=2)
+        self.assertTrue(first["more"])
+        self.assertFalse(second["more"])
+        self.assertEqual(len(first["results"]) + len(second["results"]), 30)
+
+    def test_cache_cleared(self):
+        self.assertEqual(self.get(q="lenovo")["results"], [])
+        Mmodel.objects.create(brand="Lenovo", model_name="ThinkPad")
+        self.assertEqual(len(self.get(q="lenovo")["results"]), 1)
+
+
+@override_settings(LIBTEKIN_ITEM_LIST_PAGE_SIZE=5)
+class ItemListCountTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        for number in range(12):
+            Item.objects.create(common_name=f"Item {number}")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_count(self, **params):
+        response = self.client.get(reverse("libtekin:item-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context["count"], response.context["view"].object_list.count()
+
+    def test_single_page(self):
+        count, expected = self.get_count(common_name="Item 1")
+        self.assertEqual(count, expected)
+
+    def test_cached_count_cleared(self):
+        count, expected = self.get_count()
+        self.assertEqual(count, expected)
+        Item.objects.create(common_name="Item 12")
+        self.assertEqual(self.get_count(), (expected + 1, expected + 1))
+
+
+class ItemHistoryFilterTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        cls.member = Member.objects.create(name_full="Long Tenure")
+        cls.item = Item.objects.create(common_name="Reassigned")
+        Item.objects.create(common_name="Never assigned")
+        for number in range(3):
+            ItemAssignee.objects.create(item=cls.item, assignee=cls.member)
+            ItemBorrower.objects.create(item=cls.item, borrower=cls.member)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_items_not_repeated(self):
+        for name in [
+            "historical_assignements__assignee__in",
+            "historical_borrow__borrower__in",
+        ]:
+            response = self.client.get(
+                reverse("libtekin:item-list"), {name: [self.member.pk]}
+            )
+            self.assertEqual(list(response.context["items"]), [self.item])
+
+    def test_empty_selection(self):
+        # a bound form cleans the empty history fields to queryset.none()
+        filterset = ItemFilter(
+            {
+                "historical_assignements__assignee__in": [],
+                "historical_borrow__borrower__in": [],
+                "common_name": "",
+            },
+            queryset=Item.objects.all(),
+        )
+        self.assertEqual(set(filterset.qs), set(Item.objects.all()))
+
+
+class ItemNoteListTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        level = ItemNoteLevel.objects.create(name="Info", number=0)
+        item = Item.objects.create(common_name="Noted")
+        for number in range(45):
+            ItemNote.objects.create(
+                item=item,
+                level=level,
+                when=None if number % 9 == 0 else date(2024, 1, 1 + number % 5),
+                flagged=number % 2,
+                maintext=f"Note {number}",
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages(self):
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(reverse("libtekin:itemnote-list"), params)
+            page = response.context["page"]
+            seen.extend(note.pk for note in page)
+            if not page.has_next:
+                break
+            params = {"cursor": page.next_cursor}
+        # undated notes first, as in a descending index
+        expected = ItemNote.objects.order_by(
+            F("when").desc(nulls_first=True), "-pk"
+        ).values_list("pk", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_bad_cursor(self):
+        first = self.client.get(reverse("libtekin:itemnote-list")).context["page"]
+        bad_values = [["not a date", 1], ["2024-01-01", "x"], ["2024-01-01", None]]
+        for values in bad_values:
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get(
+                reverse("libtekin:itemnote-list"), {"cursor": cursor}
+            )
+            self.assertEqual(
+                list(response.context["page"]), list(first), msg=values
+            )
+
+    def test_cached_count(self):
+        clear_choice_table("itemnote")
+        response = self.client.get(reverse("libtekin:itemnote-list"))
+        self.assertEqual(response.context["count"], 45)
+        params = {"cursor": response.context["page"].next_cursor}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("libtekin:itemnote-list"), params)
+        self.assertEqual(response.context["count"], 45)
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+        ItemNote.objects.create(maintext="Another")
+        response = self.client.get(reverse("libtekin:itemnote-list"), params)
+        self.assertEqual(response.context["count"], 46)
+
+    def test_filter(self):
+        response = self.client.get(reverse("libtekin:itemnote-list"), {"flagged": 1})
+        self.assertEqual(response.context["count"], 22)
+        self.assertTrue(all(note.flagged == 1 for note in response.context["page"]))
+
+
+class RelatedItemsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        cls.large = Location.objects.create(full_name="Large", short_name="L")
+        mmodel = Mmodel.objects.create(brand="Dell", model_name="Latitude")
+        for number in range(60):
+            Item.objects.create(
+                common_name=f"Large item {number}", mmodel=mmodel, location=cls.large
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_first_page(self):
+        response = self.client.get(
+            reverse("libtekin:location-detail", kwargs={"pk": self.large.pk})
+        )
+        self.assertEqual(response.context["item_count"], 60)
+        self.assertEqual(len(response.context["item_page"]), 25)
+
+
+class ItemCountsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        cls.mmodels = [
+            Mmodel.objects.create(brand="Dell", model_name=f"Latitude {number}")
+            for number in range(3)
+        ]
+        for number, mmodel in enumerate(cls.mmodels):
+            for count in range(number * 10):
+                Item.objects.create(common_name=f"Item {count}", mmodel=mmodel)
+        Item.objects.create(
+            common_name="Deleted", mmodel=cls.mmodels[0], is_deleted=True
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_sorted_counts(self):
+        response = self.client.get(
+            reverse("libtekin:mmodel-list"), {"sort": "-item_count"}
+        )
+        object_list = list(response.context["object_list"])
+        self.assertEqual(object_list, self.mmodels[::-1])
+        self.assertEqual([mmodel.item_count for mmodel in object_list], [20, 10, 0])
+
+
+class ItemCascadeTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        cls.location = Location.objects.create(full_name="Storage", short_name="ST")
+        cls.workstation = Item.objects.create(common_name="Workstation")
+        cls.monitor = Item.objects.create(
+            common_name="Monitor", connected_to=cls.workstation
+        )
+        cls.other = Item.objects.create(common_name="Other")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_cascade(self):
+        response = self.client.post(
+            reverse("libtekin:item-cascade", kwargs={"pk": self.workstation.pk}),
+            {"location": self.location.pk},
+        )
+        self.assertRedirects(
+            response,
+            reverse("libtekin:item-detail", kwargs={"pk": self.workstation.pk}),
+        )
+        self.assertEqual(
+            set(Item.objects.filter(location=self.location)),
+            {self.workstation, self.monitor},
+        )
+        self.assertEqual(
+            History.objects.filter(modelname="Item", fieldname="location").count(), 2
+        )
+
+        response = self.client.get(
+            reverse("libtekin:item-detail", kwargs={"pk": self.workstation.pk})
+        )
+        self.assertEqual(response.context["attached_tree"], [(self.monitor, 1)])
+
+
+class ProfileMiddlewareTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "", "admin")
+        Mmodel.objects.create(brand="Dell", model_name="Latitude")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_server_timing(self):
+        with override_settings(
+            MIDDLEWARE=settings.MIDDLEWARE + ["libtekin.middleware.ProfileMiddleware"],
+            LIBTEKIN_PROFILE=True,
+        ):
+            response = self.client.get(reverse("libtekin:mmodel-list"))
+        self.assertIn("sql;dur=", response["Server-Timing"])
+        self.assertIn('desc="mmodel-list"', response["Server-Timing"])
+        # sql, tpl and py split the total between them
+        durations = [
+            float(metric.split(";dur=")[1].split(";")[0])
+            for metric in response["Server-Timing"].split(", ")
+        ]
+        self.assertLessEqual(sum(durations[:3]), durations[3] + 0.3)
+
+    def test_off_by_default(self):
+        with override_settings(
+            MIDDLEWARE=settings.MIDDLEWARE + ["libtekin.middleware.ProfileMiddleware"]
+        ):
+            response = self.client.get(reverse("libtekin:mmodel-list"))
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -22,6 +22,7 @@ urlpatterns = [
         name="item-list",
     ),
     path("item/<int:pk>/copy/", views.ItemCopy.as_view(), name="item-copy"),
+    path("item/<int:pk>/cascade/", views.ItemCascade.as_view(), name="item-cascade"),
     path(
         "item/<str:copied_from>/copied/", views.ItemList.as_view(), name="item-copied"
     ),
@@ -30,6 +31,38 @@ urlpatterns = [
         views.ItemCSV.as_view(),
         name="item-csv",
     ),
+    path("item/import/", views.ItemImport.as_view(), name="item-import"),
+    path("item/summary/", views.ItemSummaryView.as_view(), name="item-summary"),
+    path(
+        "item/summary/json/",
+        views.ItemSummaryJSON.as_view(),
+        name="item-summary-json",
+    ),
+    path(
+        "item/formset/<str:formset>/",
+        views.ItemFormsetForm.as_view(),
+        name="item-formset-form",
+    ),
+    path(
+        "autocomplete/item/",
+        views.ItemAutocomplete.as_view(),
+        name="autocomplete-item",
+    ),
+    path(
+        "autocomplete/member/",
+        views.MemberAutocomplete.as_view(),
+        name="autocomplete-member",
+    ),
+    path(
+        "autocomplete/mmodel/",
+        views.MmodelAutocomplete.as_view(),
+        name="autocomplete-mmodel",
+    ),
+    path(
+        "autocomplete/location/",
+        views.LocationAutocomplete.as_view(),
+        name="autocomplete-location",
+    ),
     path(
         "primary_id_count/<str:primary_id>/",
         views.count_primary_id,
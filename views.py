@@ -1,16 +1,28 @@
 import csv
+import hashlib
+import io
 import logging
 from urllib.parse import urlencode
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.exceptions import FieldError, ObjectDoesNotExist
-from django.db.models import Q
-from django.http import QueryDict
-from django.http.response import HttpResponse, HttpResponseRedirect
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldError, ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import Http404, QueryDict
+from django.http.response import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, render
 from django.urls import reverse, reverse_lazy
 from django.views.generic.detail import DetailView
+from django.views.generic.base import TemplateView, View
 from django.views.generic.edit import CreateView, DeleteView, FormView, UpdateView
 from django.views.generic.list import ListView
 
@@ -19,9 +31,8 @@ from django_filters_stoex.forms import (
     FilterstoreSaveForm,
 )
 from django_filters_stoex.views import FilterView
-from libtekin.filterset import ItemFilter
+from libtekin.filterset import ItemFilter, ItemNoteFilter
 from spl_members.models import Member
-from touglates.views import make_labels
 
 from .forms import (
     EntityForm,
@@ -29,6 +40,7 @@ from .forms import (
     ItemBorrowerFormset,
     ItemCopyForm,
     ItemForm,
+    ItemImportForm,
     ItemItemNoteFormset,
     ItemNoteCategoryForm,
     ItemNoteForm,
@@ -36,8 +48,12 @@ from .forms import (
     MmodelCategoryForm,
     MmodelForm,
     CSVOptionForm,
+    ItemCascadeForm,
     MemberForm,
 )
+from .choices import clear_choice_table, get_choice_version
+from .imports import ItemImporter
+from .labels import get_labels
 from .models import (
     Entity,
     History,
@@ -45,90 +61,241 @@ from .models import (
     ItemNote,
     ItemNoteCategory,
     ItemNoteLevel,
+    ItemSummary,
     Location,
     Mmodel,
     MmodelCategory,
     Role,
+    Status,
 )
+from .pagination import KeysetPaginator
 
 logger = logging.getLogger(__name__)
 
 
-def update_history(form, modelname, object, user):
+def history_for_form(form, modelname, object, user):
+    histories = []
     for fieldname in form.changed_data:
         try:
-            old_value = (str(form.initial[fieldname]),)
+            old_value = str(form.initial[fieldname])
         except KeyError:
             old_value = None
 
-        history = History.objects.create(
-            user=user,
-            modelname=modelname,
-            objectid=object.pk,
-            fieldname=fieldname,
-            old_value=old_value,
-            new_value=str(form.cleaned_data[fieldname]),
+        histories.append(
+            History(
+                user=user,
+                modelname=modelname,
+                objectid=object.pk,
+                fieldname=fieldname,
+                old_value=old_value,
+                new_value=str(form.cleaned_data[fieldname]),
+            )
         )
+    return histories
+
+
+def update_history(form, modelname, object, user, formsets=()):
+    # Collects the changes from the form and from the saved forms of any inline
+    # formsets, and writes them all with a single insert
+    histories = history_for_form(form, modelname, object, user)
+
+    for formset in formsets:
+        for subform in formset.forms:
+            if subform.instance.pk is None or subform in formset.deleted_forms:
+                continue
+            histories.extend(
+                history_for_form(
+                    subform,
+                    subform._meta.model.__name__,
+                    subform.instance,
+                    user,
+                )
+            )
 
-        history.save()
+    with transaction.atomic():
+        return History.objects.bulk_create(histories)
 
 
-class ItemCreate(PermissionRequiredMixin, CreateView):
-    permission_required = "libtekin.add_item"
-    model = Item
-    form_class = ItemForm
-    template_name = "libtekin/item_create.html"
+class LabelsMixin:
+    # Adds the field labels of each model in labels to the context, under the
+    # name it is listed with
+    labels = {}
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
+        for name, model in self.labels.items():
+            context_data[name] = get_labels(model)
+        return context_data
 
-        formsetclasses = {
-            "itemnotes": ItemItemNoteFormset,
-            "itemborrowers": ItemBorrowerFormset,
-            "itemassignees": ItemAssigneeFormset,
-        }
 
-        for formsetkey, formsetclass in formsetclasses.items():
-            if self.request.POST:
-                context_data[formsetkey] = formsetclass(self.request.POST)
-            else:
-                context_data[formsetkey] = formsetclass()
+class CachedCountMixin:
+    """
+    Counts object_list for a keyset page.  A first page without a next page
+    already holds every row; otherwise the count is cached under the query's SQL
+    until the choice version named count_version changes, so paging through a
+    filter counts it once
+    """
+
+    count_version = None
+    count_cache_timeout = 300
+
+    def get_count(self, page):
+        if not page.has_previous and not page.has_next:
+            return len(page)
+
+        version = get_choice_version(self.count_version)
+        if version is None:
+            return self.object_list.count()
+
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = "libtekin_{}_count_{}_{}".format(
+            self.count_version,
+            version,
+            hashlib.md5("{} {!r}".format(sql, params).encode()).hexdigest(),
+        )
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+
+class RelatedItemsMixin:
+    """
+    Adds a page of the object's items, and their counts by status, to a detail
+    view.  item_lookup is the Item lookup that leads to the object.  Whatever the
+    number of items, this costs two queries
+    """
+
+    item_lookup = None
+    item_page_size = 25
+
+    def get_related_items(self):
+        return Item.objects.filter(**{self.item_lookup: self.object})
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
 
+        items = self.get_related_items()
+        status_counts = list(
+            items.order_by("status__list_position", "status__name")
+            .values("status__name")
+            .annotate(count=Count("pk"))
+        )
+        paginator = KeysetPaginator(
+            items.for_columns(["mmodel", "status", "location"]), self.item_page_size
+        )
+        page = paginator.get_page(self.request.GET.get("cursor"))
+
+        context_data["item_status_counts"] = status_counts
+        context_data["item_count"] = sum(row["count"] for row in status_counts)
+        context_data["item_page"] = page
         return context_data
 
-    def form_valid(self, form):
-        response = super().form_valid(form)
 
-        update_history(form, "Item", form.instance, self.request.user)
+class ItemCountsMixin:
+    """
+    Annotates each row of a list with item_count and active_item_count, the
+    items that are not deleted and those with an active status, in the list's
+    own query.  ?sort= orders the list by either count, descending with "-"
+    """
 
-        self.object = form.save(commit=False)
+    item_relation = None
+    paginate_by = 50
+    sort_fields = ["item_count", "active_item_count"]
 
-        formsetclasses = {
-            "itemnotes": ItemItemNoteFormset,
-            "itemborrowers": ItemBorrowerFormset,
-            "itemAssignees": ItemAssigneeFormset,
-        }
-        formsetdata = {}
-        formsets_valid = True
-        for formsetkey, formsetclass in formsetclasses.items():
-            if self.request.POST:
-                formsetdata[formsetkey] = formsetclass(
-                    self.request.POST, instance=self.object
-                )
-            else:
-                formsetdata[formsetkey] = formsetclass(instance=self.object)
+    def get_sort(self):
+        sort = self.request.GET.get("sort", "")
+        if sort.lstrip("-") in self.sort_fields:
+            return sort
+        return None
+
+    def get_queryset(self):
+        not_deleted = Q(**{f"{self.item_relation}__is_deleted": False})
+        active = Q(**{f"{self.item_relation}__status__is_active": True})
+        queryset = (
+            super()
+            .get_queryset()
+            .annotate(
+                item_count=Count(self.item_relation, filter=not_deleted),
+                active_item_count=Count(
+                    self.item_relation, filter=not_deleted & active
+                ),
+            )
+        )
+        sort = self.get_sort()
+        if sort:
+            queryset = queryset.order_by(sort, "pk")
+        elif not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data["sort"] = self.get_sort() or ""
+        return context_data
+
+
+class ItemFormsetsMixin:
+    formset_classes = {
+        "itemnotes": ItemItemNoteFormset,
+        "itemborrowers": ItemBorrowerFormset,
+        "itemassignees": ItemAssigneeFormset,
+    }
+
+    def get_formsets(self, instance=None):
+        # Built once per request, so a failed POST re-renders the same formsets
+        # instead of constructing and validating them again
+        if not hasattr(self, "formsets"):
+            self.formsets = {}
+            for formsetkey, formsetclass in self.formset_classes.items():
+                if self.request.POST:
+                    self.formsets[formsetkey] = formsetclass(
+                        self.request.POST, instance=instance
+                    )
+                else:
+                    self.formsets[formsetkey] = formsetclass(instance=instance)
+        return self.formsets
 
-            if (formsetdata[formsetkey]).is_valid():
-                formsetdata[formsetkey].save()
-            else:
-                logger.critical(formsetdata[formsetkey].errors)
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data.update(self.get_formsets(self.object))
+        return context_data
+
+    def form_valid(self, form):
+        formsets = self.get_formsets(form.instance)
+
+        formsets_valid = True
+        for formset in formsets.values():
+            if not formset.is_valid():
+                logger.critical(formset.errors)
                 formsets_valid = False
 
         if not formsets_valid:
             return self.form_invalid(form)
 
+        with transaction.atomic():
+            response = super().form_valid(form)
+            for formset in formsets.values():
+                formset.instance = self.object
+                formset.save()
+
+        update_history(
+            form, "Item", self.object, self.request.user, formsets.values()
+        )
+
         return response
 
+
+class ItemCreate(PermissionRequiredMixin, ItemFormsetsMixin, CreateView):
+    permission_required = "libtekin.add_item"
+    model = Item
+    form_class = ItemForm
+    template_name = "libtekin/item_create.html"
+
     def get_success_url(self):
 
         if "popup" in self.request.get_full_path():
@@ -149,6 +316,9 @@ class ItemCopy(PermissionRequiredMixin, UpdateView):
     fields = []
     template_name = "libtekin/item_copy.html"
 
+    def get_queryset(self):
+        return super().get_queryset().for_detail()
+
     def form_valid(self, form):
 
         self.object = form.save(commit=False)
@@ -171,121 +341,189 @@ class ItemCopy(PermissionRequiredMixin, UpdateView):
         return reverse_lazy("libtekin:item-update", kwargs={"pk": self.object.pk})
 
 
-class ItemUpdate(PermissionRequiredMixin, UpdateView):
+class ItemUpdate(PermissionRequiredMixin, ItemFormsetsMixin, UpdateView):
     permission_required = "libtekin.change_item"
     model = Item
     form_class = ItemForm
     template_name = "libtekin/item_update.html"
 
-    def get_context_data(self, *args, **kwargs):
-        context_data = super().get_context_data(*args, **kwargs)
+    def get_success_url(self):
+        if "popup" in self.kwargs:
+            return reverse(
+                "touglates:popup_closer",
+                kwargs={
+                    "pk": self.object.pk,
+                    "app_name": self.model._meta.app_label,
+                    "model_name": self.model.__name__,
+                },
+            )
+        return reverse_lazy("libtekin:item-detail", kwargs={"pk": self.object.pk})
 
-        formsetclasses = {
-            "itemnotes": ItemItemNoteFormset,
-            "itemborrowers": ItemBorrowerFormset,
-            "itemassignees": ItemAssigneeFormset,
-        }
 
-        for formsetkey, formsetclass in formsetclasses.items():
-            if self.request.POST:
-                context_data[formsetkey] = formsetclass(
-                    self.request.POST, instance=self.object
-                )
-            else:
-                context_data[formsetkey] = formsetclass(instance=self.object)
+class ItemSummaryMixin:
+    # Reads item counts from ItemSummary, narrowed by any of status, category,
+    # location and role given as ids in the query string
+    dimension_models = {
+        "status": Status,
+        "category": MmodelCategory,
+        "location": Location,
+        "role": Role,
+    }
+
+    def get_summary(self):
+        filters = {}
+        for dimension in self.dimension_models:
+            value = self.request.GET.get(dimension, "")
+            if value.isdigit():
+                filters[dimension] = int(value)
+
+        totals = ItemSummary.objects.totals(
+            filters, include_deleted=self.request.GET.get("deleted") == "1"
+        )
 
-        return context_data
+        summary = {}
+        for dimension, model in self.dimension_models.items():
+            names = model.objects.in_bulk([id for id in totals[dimension] if id])
+            summary[dimension] = sorted(
+                [
+                    {
+                        "id": id,
+                        "name": str(names[id]) if id in names else "",
+                        "count": count,
+                    }
+                    for id, count in totals[dimension].items()
+                ],
+                key=lambda row: -row["count"],
+            )
+        return summary
 
-    def form_valid(self, form):
-        response = super().form_valid(form)
 
-        self.object = form.save(commit=False)
+class ItemSummaryView(PermissionRequiredMixin, ItemSummaryMixin, TemplateView):
+    permission_required = "libtekin.view_item"
+    template_name = "libtekin/item_summary.html"
 
-        formsetclasses = {
-            "itemnotes": ItemItemNoteFormset,
-            "itemborrowers": ItemBorrowerFormset,
-            "itemAssignees": ItemAssigneeFormset,
-        }
-        formsetdata = {}
-        formsets_valid = True
-        for formsetkey, formsetclass in formsetclasses.items():
-            if self.request.POST:
-                formsetdata[formsetkey] = formsetclass(
-                    self.request.POST, instance=self.object
-                )
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data["summary"] = self.get_summary()
+        return context_data
 
-            else:
-                formsetdata[formsetkey] = formsetclass(instance=self.object)
 
-            if (formsetdata[formsetkey]).is_valid():
-                formsetdata[formsetkey].save()
-            else:
-                logger.critical(formsetdata[formsetkey].errors)
-                formsets_valid = False
+class ItemSummaryJSON(PermissionRequiredMixin, ItemSummaryMixin, View):
+    permission_required = "libtekin.view_item"
 
-        if not formsets_valid:
-            return self.form_invalid(form)
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(self.get_summary())
 
-        return response
 
-        #############
+class ItemFormsetForm(PermissionRequiredMixin, TemplateView):
+    # Renders one blank formset form for the item create and update pages, which
+    # fetch a new row each time the user asks for one
+    permission_required = ("libtekin.add_item", "libtekin.change_item")
+    template_names = {
+        "itemnotes": "libtekin/item_formset_itemnote.html",
+        "itemborrowers": "libtekin/item_formset_borrower.html",
+        "itemassignees": "libtekin/item_formset_assignee.html",
+    }
 
-        response = super().form_valid(form)
+    def has_permission(self):
+        return any(
+            self.request.user.has_perm(permission)
+            for permission in self.get_permission_required()
+        )
 
-        update_history(form, "Item", form.instance, self.request.user)
+    def get(self, request, *args, **kwargs):
+        if self.kwargs["formset"] not in self.template_names:
+            raise Http404
+        try:
+            self.index = int(request.GET.get("index", ""))
+        except ValueError:
+            return HttpResponseBadRequest("index must be a number")
+        return super().get(request, *args, **kwargs)
 
-        self.object = form.save()
+    def get_template_names(self):
+        return [self.template_names[self.kwargs["formset"]]]
 
-        formsetclasses = {
-            "itemnotes": ItemItemNoteFormset,
-            "itemborrowers": ItemBorrowerFormset,
-            "itemAssignees": ItemAssigneeFormset,
-        }
-        formsetdata = {}
-        formsets_valid = True
-        for formsetkey, formsetclass in formsetclasses.items():
-            if self.request.POST:
-                formsetdata[formsetkey] = formsetclass(
-                    self.request.POST, instance=self.object
-                )
-            else:
-                formsetdata[formsetkey] = formsetclass(instance=self.object)
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        formset = ItemFormsetsMixin.formset_classes[self.kwargs["formset"]]()
+        context_data["formsetform"] = formset.extra_form(self.index)
+        return context_data
 
-            if (formsetdata[formsetkey]).is_valid():
-                formsetdata[formsetkey].save()
-            else:
-                logger.critical(formsetdata[formsetkey].errors)
-                formsets_valid = False
 
-        if not formsets_valid:
-            return self.form_invalid(form)
+class ItemDetail(PermissionRequiredMixin, LabelsMixin, DetailView):
+    permission_required = "libtekin.view_item"
+    model = Item
+    labels = {"item_labels": Item, "itemnote_labels": ItemNote}
 
-        return response
+    def get_queryset(self):
+        return super().get_queryset().for_detail()
 
-    def get_success_url(self):
-        if "popup" in self.kwargs:
-            return reverse(
-                "touglates:popup_closer",
-                kwargs={
-                    "pk": self.object.pk,
-                    "app_name": self.model._meta.app_label,
-                    "model_name": self.model.__name__,
-                },
-            )
-        return reverse_lazy("libtekin:item-detail", kwargs={"pk": self.object.pk})
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data["connection_chain"] = self.object.get_connection_chain()
+        context_data["attached_tree"] = self.object.get_attached_tree()
+        return context_data
 
 
-class ItemDetail(PermissionRequiredMixin, DetailView):
-    permission_required = "libtekin.view_item"
-    model = Item
+class ItemCascade(PermissionRequiredMixin, FormView):
+    """
+    Sets the status or location of an item and of everything attached to it,
+    transitively, with one update, for moving or retiring a workstation
+    """
+
+    permission_required = "libtekin.change_item"
+    form_class = ItemCascadeForm
+    template_name = "libtekin/item_cascade.html"
+
+    def get_object(self):
+        if not hasattr(self, "object"):
+            try:
+                self.object = Item.objects.get(pk=self.kwargs["pk"])
+            except Item.DoesNotExist:
+                raise Http404
+        return self.object
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
+        context_data["object"] = self.get_object()
+        context_data["attached_tree"] = self.object.get_attached_tree()
+        return context_data
 
-        context_data["item_labels"] = make_labels(Item)
-        context_data["itemnote_labels"] = make_labels(ItemNote)
+    def form_valid(self, form):
+        values = {
+            name: value
+            for name, value in form.cleaned_data.items()
+            if value is not None
+        }
+        if values:
+            items = Item.all_objects.connected_tree(self.get_object())
+            # The old values come from the locked rows, and the history is written
+            # with the update or not at all
+            with transaction.atomic():
+                old_values = list(
+                    items.select_for_update().values(
+                        "pk", *[name + "_id" for name in values]
+                    )
+                )
+                items.update_connected(**values)
+                History.objects.bulk_create(
+                    [
+                        History(
+                            user=self.request.user,
+                            modelname="Item",
+                            objectid=row["pk"],
+                            fieldname=name,
+                            old_value=str(row[name + "_id"]),
+                            new_value=str(value),
+                        )
+                        for row in old_values
+                        for name, value in values.items()
+                        if row[name + "_id"] != value.pk
+                    ]
+                )
+            clear_choice_table("item")
 
-        return context_data
+        return redirect(self.get_object())
 
 
 class ItemDelete(PermissionRequiredMixin, UpdateView):
@@ -294,111 +532,122 @@ class ItemDelete(PermissionRequiredMixin, UpdateView):
     success_url = reverse_lazy("libtekin:item-list")
 
 
-class ItemSoftDelete(PermissionRequiredMixin, UpdateView):
+class ItemSoftDelete(PermissionRequiredMixin, LabelsMixin, UpdateView):
     permission_required = "libtekin.delete_item"
     model = Item
     template_name = "libtekin/item_confirm_delete.html"
     success_url = reverse_lazy("libtekin:item-list")
     fields = ["is_deleted"]
+    labels = {"item_labels": Item, "itemnote_labels": ItemNote}
 
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
+    def get_queryset(self):
+        return super().get_queryset().for_detail()
 
-        context_data["item_labels"] = make_labels(Item)
-        context_data["itemnote_labels"] = make_labels(ItemNote)
 
-        return context_data
-
-
-class ItemList(PermissionRequiredMixin, FilterView):
+class ItemList(PermissionRequiredMixin, LabelsMixin, CachedCountMixin, FilterView):
     permission_required = "libtekin.view_item"
     filterset_class = ItemFilter
     filterstore_urlname = "libtekin:item-filterstore"
+    page_size = 100
+    count_version = "item"
+    labels = {"labels": Item}
+
+    def get_page_size(self):
+        if hasattr(settings, "LIBTEKIN_ITEM_LIST_PAGE_SIZE"):
+            return settings.LIBTEKIN_ITEM_LIST_PAGE_SIZE
+        return self.page_size
+
+    def get_show_columns(self):
+        return self.request.POST.getlist("show_columns") or self.request.GET.getlist(
+            "show_columns"
+        )
+
+    def get_ordering(self):
+        try:
+            return self.filterset.form.cleaned_data.get("orderbyfields") or None
+        except AttributeError:
+            return None
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
 
+        show_columns = self.get_show_columns()
+        queryset = self.object_list.for_columns(show_columns)
+        if not show_columns or "status_notes" in show_columns:
+            queryset = queryset.with_status_notes()
+        paginator = KeysetPaginator(
+            queryset,
+            self.get_page_size(),
+            ordering=self.get_ordering(),
+        )
+        page = paginator.get_page(
+            self.request.POST.get("cursor") or self.request.GET.get("cursor")
+        )
+        context_data["show_columns"] = show_columns
+        context_data["page"] = page
+        context_data["items"] = page.object_list
+
         context_data["filterstore_retrieve"] = FilterstoreRetrieveForm()
         context_data["filterstore_save"] = FilterstoreSaveForm()
         context_data["make_csv"] = self.request.POST.get("make_csv", None)
         context_data["csv_form"] = CSVOptionForm()
-        context_data["count"] = self.object_list.count()
-        context_data["labels"] = make_labels(Item)
+        context_data["count"] = self.get_count(page)
         return context_data
 
 
+class Echo:
+    # A file-like object for csv.writer that hands each row straight back
+    def write(self, value):
+        return value
+
+
 class ItemCSV(PermissionRequiredMixin, FilterView):
 
     permission_required = "libtekin.view_item"
     filterset_class = ItemFilter
-    template_name = "libtekin/csv.txt"
-    content_type = "text/csv"
-    headers = {"Content-Disposition": 'attachment; filename="libtekin.csv"'}
-
-    def dispatch(self, *args, **kwargs):
-        response = super().dispatch(*args, **kwargs)
-        response.headers = {
-            "Content-Disposition": 'attachment; filename="libtekin.csv"'
-        }
-        return response
+    chunk_size = 2000
 
-    def get_context_data(self, *args, **kwargs):
-
-        context_data = super().get_context_data(*args, **kwargs)
-
-        data = [
-            [
-                "common_name",
-                "mmodel",
-                "primary_id_field",
-                "serial_number",
-                "bios_serial_number",
-                "asset_number",
-                "barcode",
-                "phone_number",
-                "mobile_id",
-                "sim_iccid",
-                "connected_to",
-                "status",
-                "network_name",
-                "owner",
-                "assignee",
-                "borrower",
-                "home",
-                "latest_inventory",
-                "installation_date",
-                "location",
-                "role",
-            ]
-        ]
-        for item in context_data["filter"].qs:
-            data.append(
+    def get_rows(self, queryset):
+        writer = csv.writer(Echo())
+        yield writer.writerow(Item.CSV_COLUMNS)
+        for item in queryset.for_columns().iterator(chunk_size=self.chunk_size):
+            yield writer.writerow(
                 [
-                    item.common_name,
-                    item.mmodel,
-                    item.primary_id_field,
-                    item.serial_number,
-                    item.bios_serial_number,
-                    item.asset_number,
-                    item.barcode,
-                    item.phone_number,
-                    item.mobile_id,
-                    item.sim_iccid,
-                    item.connected_to,
-                    item.status,
-                    item.network_name,
-                    item.owner,
-                    item.assignee,
-                    item.borrower,
-                    item.home,
-                    item.latest_inventory,
-                    item.installation_date,
-                    item.location,
-                    item.role,
+                    "" if getattr(item, column) is None else getattr(item, column)
+                    for column in Item.CSV_COLUMNS
                 ]
             )
-        context_data["data"] = data
-        return context_data
+
+    def render_to_response(self, context, **response_kwargs):
+        return StreamingHttpResponse(
+            self.get_rows(self.object_list),
+            content_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="libtekin.csv"'},
+        )
+
+
+class ItemImport(PermissionRequiredMixin, FormView):
+    permission_required = "libtekin.add_item"
+    form_class = ItemImportForm
+    template_name = "libtekin/item_import.html"
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        if upload.name.lower().endswith((".json", ".jsonl")):
+            format = "json"
+        else:
+            format = "csv"
+
+        importer = ItemImporter(user=self.request.user)
+        importer.run(
+            io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""), format
+        )
+
+        return self.render_to_response(
+            self.get_context_data(
+                form=form, imported=importer.imported, errors=importer.errors
+            )
+        )
 
 
 class ItemClose(PermissionRequiredMixin, DetailView):
@@ -437,16 +686,13 @@ class MmodelUpdate(PermissionRequiredMixin, UpdateView):
         return reverse_lazy("libtekin:mmodel-detail", kwargs={"pk": self.object.pk})
 
 
-class MmodelDetail(PermissionRequiredMixin, DetailView):
+class MmodelDetail(
+    PermissionRequiredMixin, RelatedItemsMixin, LabelsMixin, DetailView
+):
     permission_required = "libtekin.view_mmodel"
     model = Mmodel
-
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-
-        context_data["mmodel_labels"] = make_labels(Mmodel)
-
-        return context_data
+    labels = {"mmodel_labels": Mmodel}
+    item_lookup = "mmodel"
 
 
 class MmodelDelete(PermissionRequiredMixin, DeleteView):
@@ -455,16 +701,11 @@ class MmodelDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("libtekin:mmodel-list")
 
 
-class MmodelList(PermissionRequiredMixin, ListView):
+class MmodelList(PermissionRequiredMixin, ItemCountsMixin, LabelsMixin, ListView):
     permission_required = "libtekin.view_mmodel"
     model = Mmodel
-
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-
-        context_data["mmodel_labels"] = make_labels(Mmodel)
-
-        return context_data
+    labels = {"mmodel_labels": Mmodel}
+    item_relation = "item"
 
 
 class MmodelClose(PermissionRequiredMixin, DetailView):
@@ -502,9 +743,10 @@ class MmodelCategoryUpdate(PermissionRequiredMixin, UpdateView):
         )
 
 
-class MmodelCategoryDetail(PermissionRequiredMixin, DetailView):
+class MmodelCategoryDetail(PermissionRequiredMixin, RelatedItemsMixin, DetailView):
     permission_required = "libtekin.view_MmodelCategory"
     model = MmodelCategory
+    item_lookup = "mmodel__category"
 
 
 class MmodelCategoryDelete(PermissionRequiredMixin, DeleteView):
@@ -513,9 +755,10 @@ class MmodelCategoryDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("libtekin:MmodelCategory-list")
 
 
-class MmodelCategoryList(PermissionRequiredMixin, ListView):
+class MmodelCategoryList(PermissionRequiredMixin, ItemCountsMixin, ListView):
     permission_required = "libtekin.view_MmodelCategory"
     model = MmodelCategory
+    item_relation = "mmodel__item"
 
 
 class MmodelCategoryClose(PermissionRequiredMixin, DetailView):
@@ -549,9 +792,10 @@ class LocationUpdate(PermissionRequiredMixin, UpdateView):
         return reverse_lazy("libtekin:location-detail", kwargs={"pk": self.object.pk})
 
 
-class LocationDetail(PermissionRequiredMixin, DetailView):
+class LocationDetail(PermissionRequiredMixin, RelatedItemsMixin, DetailView):
     permission_required = "libtekin.view_location"
     model = Location
+    item_lookup = "location"
 
 
 class LocationDelete(PermissionRequiredMixin, DeleteView):
@@ -560,9 +804,10 @@ class LocationDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("libtekin:location-list")
 
 
-class LocationList(PermissionRequiredMixin, ListView):
+class LocationList(PermissionRequiredMixin, ItemCountsMixin, ListView):
     permission_required = "libtekin.view_location"
     model = Location
+    item_relation = "item_located"
 
 
 class LocationClose(PermissionRequiredMixin, DetailView):
@@ -619,9 +864,10 @@ class EntityDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("libtekin:entity-list")
 
 
-class EntityList(PermissionRequiredMixin, ListView):
+class EntityList(PermissionRequiredMixin, ItemCountsMixin, ListView):
     permission_required = "libtekin.view_entity"
     model = Entity
+    item_relation = "item_owned"
 
 
 class EntityClose(PermissionRequiredMixin, DetailView):
@@ -630,6 +876,118 @@ class EntityClose(PermissionRequiredMixin, DetailView):
     template_name = "libtekin/entity_closer.html"
 
 
+class AutocompleteView(PermissionRequiredMixin, View):
+    """
+    Returns a page of {"id", "text"} results as JSON for AutocompleteSelect.  A
+    result matches when q, or else every word of q, starts one of the search
+    fields.  Results are cached until the choice table of the same name is cleared
+    """
+
+    model = None
+    search_fields = []
+    choice_table = None
+    paginate_by = 20
+    cache_timeout = 300
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def get_label(self, object):
+        return str(object)
+
+    def search(self, queryset, q):
+        if not q:
+            return queryset
+
+        phrase_q = Q()
+        for search_field in self.search_fields:
+            phrase_q = phrase_q | Q(**{f"{search_field}__istartswith": q})
+
+        words_q = Q()
+        for word in q.split():
+            word_q = Q()
+            for search_field in self.search_fields:
+                word_q = word_q | Q(**{f"{search_field}__istartswith": word})
+            words_q = words_q & word_q
+
+        return queryset.filter(phrase_q | words_q)
+
+    def get_results(self, q, page):
+        queryset = self.search(self.get_queryset(), q)
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        start = (page - 1) * self.paginate_by
+        objects = list(queryset[start : start + self.paginate_by + 1])
+        return {
+            "results": [
+                {"id": object.pk, "text": self.get_label(object)}
+                for object in objects[: self.paginate_by]
+            ],
+            "more": len(objects) > self.paginate_by,
+        }
+
+    def get(self, request, *args, **kwargs):
+        q = request.GET.get("q", "").strip()
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+
+        version = get_choice_version(self.choice_table)
+        if version is None:
+            return JsonResponse(self.get_results(q, page))
+
+        key = "libtekin_autocomplete_{}_{}_{}_{}".format(
+            self.choice_table,
+            version,
+            hashlib.md5(q.casefold().encode()).hexdigest(),
+            page,
+        )
+        results = cache.get(key)
+        if results is None:
+            results = self.get_results(q, page)
+            cache.set(key, results, self.cache_timeout)
+        return JsonResponse(results)
+
+
+class ItemAutocomplete(AutocompleteView):
+    permission_required = "libtekin.view_item"
+    model = Item
+    choice_table = "item"
+    search_fields = [
+        "common_name",
+        "primary_id",
+        "serial_number",
+        "asset_number",
+        "barcode",
+        "network_name",
+    ]
+
+    def get_queryset(self):
+        return Item.objects.only("pk", "common_name", "primary_id")
+
+
+class MemberAutocomplete(AutocompleteView):
+    permission_required = "libtekin.view_item"
+    model = Member
+    choice_table = "member"
+    search_fields = ["name_full", "name_prefered", "surname"]
+
+
+class MmodelAutocomplete(AutocompleteView):
+    permission_required = "libtekin.view_mmodel"
+    model = Mmodel
+    choice_table = "mmodel"
+    search_fields = ["brand", "model_name", "model_number"]
+
+
+class LocationAutocomplete(AutocompleteView):
+    permission_required = "libtekin.view_location"
+    model = Location
+    choice_table = "location"
+    search_fields = ["full_name", "short_name"]
+
+
 def get_primary_id_field(request, mmodel_id):
     try:
         return Mmodel.objects.get(pk=mmodel_id).primary_id_field
@@ -654,9 +1012,7 @@ class ItemNoteCreate(PermissionRequiredMixin, CreateView):
     def form_valid(self, form):
         response = super().form_valid(form)
 
-        update_history(form, "ItemNote", form.instance, self.request.user)
-
-        self.object = form.save()
+        update_history(form, "ItemNote", self.object, self.request.user)
 
         return response
 
@@ -677,11 +1033,9 @@ class ItemNoteUpdate(PermissionRequiredMixin, UpdateView):
     form_class = ItemNoteForm
 
     def form_valid(self, form):
-        update_history(form, "ItemNote", form.instance, self.request.user)
-
         response = super().form_valid(form)
 
-        self.object = form.save()
+        update_history(form, "ItemNote", self.object, self.request.user)
 
         return response
 
@@ -689,17 +1043,10 @@ class ItemNoteUpdate(PermissionRequiredMixin, UpdateView):
         return reverse_lazy("libtekin:itemnote-detail", kwargs={"pk": self.object.pk})
 
 
-class ItemNoteDetail(PermissionRequiredMixin, DetailView):
+class ItemNoteDetail(PermissionRequiredMixin, LabelsMixin, DetailView):
     permission_required = "libtekin.view_itemnote"
     model = ItemNote
-
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-
-        context_data["itemnote_labels"] = make_labels(ItemNote)
-        context_data["item_labels"] = make_labels(Item)
-
-        return context_data
+    labels = {"itemnote_labels": ItemNote, "item_labels": Item}
 
 
 class ItemNoteDelete(PermissionRequiredMixin, DeleteView):
@@ -708,31 +1055,47 @@ class ItemNoteDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("libtekin:itemnote-list")
 
 
-class ItemNoteSoftDelete(PermissionRequiredMixin, UpdateView):
+class ItemNoteSoftDelete(PermissionRequiredMixin, LabelsMixin, UpdateView):
     permission_required = "libtekin.delete_itemnote"
     model = ItemNote
     template_name = "libtekin/itemnote_confirm_delete.html"
     success_url = reverse_lazy("libtekin:itemnote-list")
     fields = ["is_deleted"]
+    labels = {"itemnote_labels": ItemNote, "item_labels": Item}
 
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-
-        context_data["itemnote_labels"] = make_labels(ItemNote)
-        context_data["item_labels"] = make_labels(Item)
 
-        return context_data
-
-
-class ItemNoteList(PermissionRequiredMixin, ListView):
+class ItemNoteList(PermissionRequiredMixin, LabelsMixin, CachedCountMixin, ListView):
     permission_required = "libtekin.view_itemnote"
     model = ItemNote
-    paginate_by = 30
+    page_size = 30
+    count_version = "itemnote"
+    labels = {"labels": ItemNote}
+
+    def get_queryset(self):
+        queryset = (
+            super()
+            .get_queryset()
+            .select_related("item__mmodel", "level", "itemnotecategory")
+        )
+        self.filterset = ItemNoteFilter(self.request.GET or None, queryset=queryset)
+        return self.filterset.qs
 
     def get_context_data(self, **kwargs):
+        # Pages are fetched by keyset on (-when, -pk), which the note index serves
+        # however deep the page is
+        paginator = KeysetPaginator(
+            self.object_list, self.page_size, ordering=["-when", "-pk"]
+        )
+        page = paginator.get_page(self.request.GET.get("cursor"))
+        kwargs["object_list"] = page.object_list
         context_data = super().get_context_data(**kwargs)
 
-        context_data["count"] = self.object_list.count()
+        query = self.request.GET.copy()
+        query.pop("cursor", None)
+        context_data["filter"] = self.filterset
+        context_data["query"] = query.urlencode()
+        context_data["page"] = page
+        context_data["count"] = self.get_count(page)
 
         return context_data
 
@@ -745,9 +1108,7 @@ class ItemNoteCategoryCreate(PermissionRequiredMixin, CreateView):
     def form_valid(self, form):
         response = super().form_valid(form)
 
-        update_history(form, "ItemNoteCategory", form.instance, self.request.user)
-
-        self.object = form.save()
+        update_history(form, "ItemNoteCategory", self.object, self.request.user)
 
         return response
 
@@ -768,11 +1129,9 @@ class ItemNoteCategoryUpdate(PermissionRequiredMixin, UpdateView):
     form_class = ItemNoteCategoryForm
 
     def form_valid(self, form):
-        update_history(form, "ItemNoteCategory", form.instance, self.request.user)
-
         response = super().form_valid(form)
 
-        self.object = form.save()
+        update_history(form, "ItemNoteCategory", self.object, self.request.user)
 
         return response
 
@@ -782,17 +1141,10 @@ class ItemNoteCategoryUpdate(PermissionRequiredMixin, UpdateView):
         )
 
 
-class ItemNoteCategoryDetail(PermissionRequiredMixin, DetailView):
+class ItemNoteCategoryDetail(PermissionRequiredMixin, LabelsMixin, DetailView):
     permission_required = "libtekin.view_itemnotecategory"
     model = ItemNoteCategory
-
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-
-        context_data["itemnotecategory_labels"] = make_labels(ItemNoteCategory)
-        context_data["item_labels"] = make_labels(Item)
-
-        return context_data
+    labels = {"itemnotecategory_labels": ItemNoteCategory, "item_labels": Item}
 
 
 class ItemNoteCategoryDelete(PermissionRequiredMixin, UpdateView):